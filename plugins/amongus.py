@@ -6,14 +6,20 @@
 # Ported By Github/code-rgb [TG- @deleteduser420]
 
 
-import os
 from io import BytesIO
 from random import randint
 from textwrap import wrap
 
-from PIL import Image, ImageDraw, ImageFont
-from requests import get
-from paimon import Config, Message, paimon
+from PIL import Image, ImageDraw
+from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import assets
+from resources.memfile import to_file
+from resources.output_cache import output_key, remember, send_cached
+from resources.process_pool import run_in_process
+from resources.textfit import load_font, measure
+
+ASSETS_URL = "https://raw.githubusercontent.com/code-rgb/AmongUs/master/"
 
 CLRS = {
     "red": 1,
@@ -64,23 +70,38 @@ async def among_us(message: Message):
         color = CLRS[choice]
     else:
         color = randint(1, 12)
-    stickerx = await amongus_gen(text, color)
     reply_id = reply.message_id if reply else None
-    await message.client.send_sticker(
+    key = output_key(message.client, "amongus", color, text)
+    if await send_cached(message.client, message.chat.id, key, reply_id):
+        await message.delete()
+        return
+    try:
+        stickerx = await amongus_gen(text, color, message)
+    except ProcessCanceled as p_c:
+        return await message.err(str(p_c), del_in=5)
+    sent = await message.client.send_sticker(
         message.chat.id, sticker=stickerx, reply_to_message_id=reply_id
     )
+    await remember(key, sent)
     await message.delete()
-    os.remove(stickerx)
 
 
-async def amongus_gen(text: str, clr: int) -> str:
-    url = "https://raw.githubusercontent.com/code-rgb/AmongUs/master/"
-    font = ImageFont.truetype(BytesIO(get(url + "bold.ttf").content), 60)
-    imposter = Image.open(BytesIO(get(f"{url}{clr}.png").content))
+assets.register(ASSETS_URL + "bold.ttf", 60)
+for _clr in CLRS.values():
+    assets.register(f"{ASSETS_URL}{_clr}.png")
+
+
+async def amongus_gen(text: str, clr: int, message: Message = None) -> BytesIO:
+    font = await assets.fetch(ASSETS_URL + "bold.ttf")
+    imposter = await assets.fetch(f"{ASSETS_URL}{clr}.png")
+    return await run_in_process(draw_amongus, text, font, imposter, message=message)
+
+
+def draw_amongus(text: str, font_file: str, imposter_file: str) -> BytesIO:
+    font = load_font(font_file, 60)
+    imposter = assets.open_image(imposter_file)
     text_ = "\n".join("\n".join(wrap(part, 30)) for part in text.split("\n"))
-    w, h = ImageDraw.Draw(Image.new("RGB", (1, 1))).multiline_textsize(
-        text_, font, stroke_width=2
-    )
+    w, h = measure(font_file, 60, text_, 2)
     text = Image.new("RGBA", (w + 30, h + 30))
     ImageDraw.Draw(text).multiline_text(
         (15, 15), text_, "#FFF", font, stroke_width=2, stroke_fill="#000"
@@ -91,8 +112,4 @@ async def amongus_gen(text: str, clr: int) -> str:
     image.paste(imposter, (0, h - imposter.height), imposter)
     image.paste(text, (w - text.width, 0), text)
     image.thumbnail((512, 512))
-    output = BytesIO()
-    output.name = "imposter.webp"
-    webp_file = os.path.join(Config.DOWN_PATH, output.name)
-    image.save(webp_file, "WebP")
-    return webp_file
+    return to_file(image, "imposter.webp")
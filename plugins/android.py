@@ -7,8 +7,9 @@
 """for stuff related to android"""
 
 from bs4 import BeautifulSoup
-from requests import get
 from paimon import Message, paimon
+from resources import http_client
+from resources.cache import cached
 
 
 @paimon.on_cmd(
@@ -26,27 +27,39 @@ async def device_recovery(message: Message):
         await message.err("```Provide Device Codename !!```", del_in=3)
         return
     await message.delete()
-    url = get(f"https://dl.twrp.me/{device}/")
-    if url.status_code == 404:
+    reply = await _twrp_release(device)
+    if reply is None:
         reply = f"`Couldn't find twrp downloads for {device}!`\n"
         return await message.edit(reply, del_in=5)
+    await message.edit(reply)
+
+
+@cached("twrp", ttl=6 * 3600, persist=True, cache_if=lambda reply: reply is not None)
+async def _twrp_release(device: str):
+    url = await http_client.get(f"https://dl.twrp.me/{device}/")
+    if url.status == 404:
+        return None
     page = BeautifulSoup(url.content, "lxml")
     download = page.find("table").find("tr").find("a")
     dl_link = f"https://dl.twrp.me{download['href']}"
     dl_file = download.text
     size = page.find("span", {"class": "filesize"}).text
     date = page.find("em").text.strip()
-    reply = (
+    return (
         f"**Latest TWRP for {device}:**\n"
         f"[{dl_file}]({dl_link}) - __{size}__\n"
         f"**Updated:** __{date}__"
     )
-    await message.edit(reply)
 
 
 @paimon.on_cmd("magisk$", about={"header": "Get Latest Magisk Zip and Manager"})
 async def magisk_(message: Message):
     """Get Latest MAGISK"""
+    await message.edit(await _magisk_releases(), disable_web_page_preview=True)
+
+
+@cached("magisk", ttl=3600)
+async def _magisk_releases() -> str:
     magisk_repo = "https://raw.githubusercontent.com/topjohnwu/magisk_files/"
     magisk_dict = {
         "⦁ 𝗦𝘁𝗮𝗯𝗹𝗲": magisk_repo + "master/stable.json",
@@ -55,7 +68,7 @@ async def magisk_(message: Message):
     }
     releases = "<code><i>𝗟𝗮𝘁𝗲𝘀𝘁 𝗠𝗮𝗴𝗶𝘀𝗸 𝗥𝗲𝗹𝗲𝗮𝘀𝗲:</i></code>\n\n"
     for name, release_url in magisk_dict.items():
-        data = get(release_url).json()
+        data = (await http_client.get(release_url)).json()
         if "canary" in release_url:
             data["app"]["link"] = magisk_repo + "canary/" + data["app"]["link"]
             data["magisk"]["link"] = magisk_repo + "canary/" + data["magisk"]["link"]
@@ -68,5 +81,4 @@ async def magisk_(message: Message):
             f'[APK v{data["app"]["version"]}]({data["app"]["link"]}) | '
             f'[Uninstaller]({data["uninstaller"]["link"]})\n'
         )
-
-    await message.edit(releases, disable_web_page_preview=True)
+    return releases
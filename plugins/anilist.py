@@ -8,19 +8,29 @@
 # (C) Author: Phyco-Ninja (https://github.com/Phyco-Ninja) (@PhycoNinja13b)
 
 import os
+import time
+import heapq
+import asyncio
 from datetime import datetime
 
 import flag as cflag
 import humanize
 import tracemoepy
-from aiohttp import ClientSession
-from html_telegraph_poster import TelegraphPoster
+from PIL import Image
+from pymongo import UpdateOne
 from tracemoepy.errors import ServerError
-from paimon import paimon, Message, get_collection, Config
-from paimon.utils import progress, take_screen_shot
+from paimon import paimon, Message, get_collection
+from paimon.utils import runcmd
+from paimon.utils.exceptions import ProcessCanceled
+from resources import http_client, media_cache, ratelimit, telegraph
+from resources.cache import TTLCache, cached
+from resources.frames import first_frame
+from resources.process_pool import run_in_process
+from resources.workspace import Workspace
 
 # Logging Errors
 CLOG = paimon.getCLogger(__name__)
+LOG = paimon.getLogger(__name__)
 
 # Default templates for Query Formatting
 ANIME_TEMPLATE = """[{c_flag}]**{romaji}**
@@ -37,13 +47,32 @@ ANIME_TEMPLATE = """[{c_flag}]**{romaji}**
 ➤ **ADULT RATED:** `{adult}`
 🎬 {trailer_link}
 📖 [Synopsis & More]({synopsis_link})"""
+# used when a saved Template asks for a Key that doesn't exist anymore
+DEFAULT_ANIME_TEMPLATE = ANIME_TEMPLATE
 
 SAVED = get_collection("TEMPLATES")
+# Local time sorted Index of upcoming Episodes and Notify Subscriptions
+SCHEDULE = get_collection("ANIME_SCHEDULE")
+NOTIFY = get_collection("ANIME_NOTIFY")
+
+# Re-sync the Schedule Index every 6 hours
+SCHEDULE_REFRESH = int(os.environ.get("ANIME_SCHEDULE_REFRESH") or 6 * 3600)
+# Aired Episodes are kept a day so a Restart can still notify them
+SCHEDULE_KEEP = 24 * 3600
+# .scheduled lists at most this many Episodes of the coming Week
+SCHEDULE_WINDOW = 7 * 24 * 3600
+SCHEDULE_LIMIT = 50
+_SCHEDULE_CHANGED = asyncio.Event()
+_SCHEDULE_SYNC = asyncio.Event()
+
+# Frames sampled from a Clip and parallel trace.moe Searches for .reverse
+REVERSE_FRAMES = 5
+REVERSE_CONCURRENCY = 2
+# Reverse Search Results by perceptual Hash of the Frames
+_REVERSED = TTLCache("tracemoe", ttl=30 * 24 * 3600, maxsize=256, persist=True)
 
 # GraphQL Queries.
-ANIME_QUERY = """
-query ($id: Int, $idMal:Int, $search: String, $type: MediaType, $asHtml: Boolean) {
-  Media (id: $id, idMal: $idMal, search: $search, type: $type) {
+MEDIA_FIELDS = """{
     id
     idMal
     title {
@@ -102,36 +131,30 @@ query ($id: Int, $idMal:Int, $search: String, $type: MediaType, $asHtml: Boolean
       }
     }
     siteUrl
-  }
+  }"""
+
+ANIME_QUERY = """
+query ($id: Int, $idMal:Int, $search: String, $type: MediaType, $asHtml: Boolean) {
+  Media (id: $id, idMal: $idMal, search: $search, type: $type) """ + MEDIA_FIELDS + """
 }
 """
 
-AIRING_QUERY = """
-query ($id: Int, $mediaId: Int, $notYetAired: Boolean) {
-  Page(page: 1, perPage: 50) {
-    airingSchedules (id: $id, mediaId: $mediaId, notYetAired: $notYetAired) {
+SCHEDULE_QUERY = """
+query ($page: Int) {
+  Page(page: $page, perPage: 50) {
+    pageInfo {
+      hasNextPage
+    }
+    airingSchedules (notYetAired: true, sort: TIME) {
       id
       airingAt
-      timeUntilAiring
       episode
       mediaId
       media {
         title {
           romaji
           english
-          native
         }
-        duration
-        coverImage {
-          extraLarge
-        }
-        nextAiringEpisode {
-          airingAt
-          timeUntilAiring
-          episode
-        }
-        bannerImage
-        averageScore
         siteUrl
       }
     }
@@ -139,9 +162,7 @@ query ($id: Int, $mediaId: Int, $notYetAired: Boolean) {
 }
 """
 
-CHARACTER_QUERY = """
-query ($search: String, $asHtml: Boolean) {
-  Character (search: $search) {
+CHARACTER_FIELDS = """{
     id
     name {
       full
@@ -171,39 +192,54 @@ query ($search: String, $asHtml: Boolean) {
         description (asHtml: $asHtml)
       }
     }
-  }
+  }"""
+
+CHARACTER_QUERY = """
+query ($search: String, $asHtml: Boolean) {
+  Character (search: $search) """ + CHARACTER_FIELDS + """
 }
 """
 
+# Lookups per batched Query, AniList rejects too complex Queries
+BATCH_SIZE = 10
+# Variable Types used to build batched Queries
+GQL_TYPES = {
+    'id': "Int",
+    'idMal': "Int",
+    'search': "String",
+    'type': "MediaType"
+}
+
 
 async def _init():
     global ANIME_TEMPLATE  # pylint: disable=global-statement
-    template = await SAVED.find_one({'_id': "ANIME_TEPLATE"})
+    template = await SAVED.find_one({'_id': "ANIME_TEMPLATE"})
     if template:
         ANIME_TEMPLATE = template['anime_data']
 
 
+async def _anilist_post(query, vars_):
+    """ Uncached Post to https://graphql.anilist.co. """
+    url_ = "https://graphql.anilist.co"
+    post_con = await http_client.post(url_, json={'query': query, 'variables': vars_})
+    return post_con.json()
+
+
+@cached("anilist", ttl=1800, maxsize=256, persist=True,
+        cache_if=lambda result: not result.get('errors'))
 async def return_json_senpai(query, vars_):
     """ Makes a Post to https://graphql.anilist.co. """
-    url_ = "https://graphql.anilist.co"
-    async with ClientSession() as api_:
-        post_con = await api_.post(url_, json={'query': query, 'variables': vars_})
-        json_data = await post_con.json()
-        return json_data
+    return await _anilist_post(query, vars_)
 
 
-def post_to_tp(a_title, content):
+async def post_to_tp(a_title, content):
     """ Create a Telegram Post using HTML Content """
-    post_client = TelegraphPoster(use_api=True)
-    auth_name = "@PhycoNinja13b"
-    post_client.create_api_token(auth_name)
-    post_page = post_client.post(
-        title=a_title,
-        author=auth_name,
-        author_url="https://t.me/PhycoNinja13b",
-        text=content
+    return await telegraph.post_page(
+        a_title,
+        content,
+        author_name="@PhycoNinja13b",
+        author_url="https://t.me/PhycoNinja13b"
     )
-    return post_page['url']
 
 
 def make_it_rw(time_stamp, as_countdown=False):
@@ -215,83 +251,119 @@ def make_it_rw(time_stamp, as_countdown=False):
     return str(humanize.naturaldate(datetime.fromtimestamp(time_stamp)))
 
 
+def split_queries(query):
+    """ Split ';' separated Titles / IDs """
+    return [q_.strip() for q_ in query.split(';') if q_.strip()]
+
+
+def media_vars(query, mal_id=False):
+    """ Lookup Variables of a single Anime Title / ID """
+    if query.isdigit():
+        return {('idMal' if mal_id else 'id'): int(query), 'type': "ANIME"}
+    return {'search': query, 'type': "ANIME"}
+
+
+async def batch_lookup(field, fields, vars_list):
+    """ Resolve several Lookups in aliased GraphQL Requests of BATCH_SIZE.
+    Returns a list of (data, error) in the order of vars_list. """
+    batches = await asyncio.gather(*(
+        _batch_query(field, fields, vars_list[i:i + BATCH_SIZE])
+        for i in range(0, len(vars_list), BATCH_SIZE)))
+    return [found for batch in batches for found in batch]
+
+
+async def _batch_query(field, fields, vars_list):
+    """ One aliased GraphQL Request for all of vars_list """
+    var_defs = ["$asHtml: Boolean"]
+    aliases = []
+    variables = {'asHtml': True}
+    for i, vars_ in enumerate(vars_list):
+        args = []
+        for name, value in vars_.items():
+            var_defs.append(f"${name}{i}: {GQL_TYPES[name]}")
+            args.append(f"{name}: ${name}{i}")
+            variables[f"{name}{i}"] = value
+        aliases.append(f"  q{i}: {field} ({', '.join(args)}) {fields}")
+    query = "query (" + ", ".join(var_defs) + ") {\n" + "\n".join(aliases) + "\n}"
+    result = await return_json_senpai(query, variables)
+    data = result.get('data') or {}
+    errors = result.get('errors') or []
+    if errors:
+        await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n`{errors}`")
+    path_errors = {}
+    for error in errors:
+        for alias in error.get('path') or []:
+            path_errors[alias] = error.get('message')
+    default_error = errors[0].get('message') if errors else "Not Found"
+    return [
+        (data.get(f"q{i}"), path_errors.get(f"q{i}", default_error))
+        for i in range(len(vars_list))
+    ]
+
+
 @paimon.on_cmd("anime", about={
     'header': "Anime Search",
-    'description': "Search for Anime using AniList API",
+    'description': "Search for Anime using AniList API, "
+                   "separate multiple Titles or IDs with ;",
     'flags': {
         '-mid': "Search Anime using MAL ID",
-        '-wp': "Get webpage previews "},
+        '-wp': "Get webpage previews ",
+        '-c': "Post all Results in one Telegraph Page"},
     'usage': "{tr}anime [flag] [anime name | ID]",
     'examples': [
         "{tr}anime 98444", "{tr}anime -mid 39576",
-        "{tr}anime Asterisk war"]})
+        "{tr}anime Asterisk war", "{tr}anime Naruto; Bleach; 98444"]})
 async def anim_arch(message: Message):
     """ Search Anime Info """
     query = message.filtered_input_str
     if not query:
         await message.err("NameError: 'query' not defined")
         return
-    vars_ = {
-        'search': query,
-        'asHtml': True,
-        'type': "ANIME"
-    }
-    if query.isdigit():
-        vars_ = {
-            'id': int(query),
-            'asHtml': True,
-            'type': "ANIME"
-        }
-        if '-mid' in message.flags:
-            vars_ = {
-                'idMal': int(query),
-                'asHtml': True,
-                'type': "ANIME"
-            }
-
-    result = await return_json_senpai(ANIME_QUERY, vars_)
-    error = result.get('errors')
-    if error:
-        await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n`{error}`")
-        error_sts = error[0].get('message')
-        await message.err(f"[{error_sts}]")
+    queries = split_queries(query)
+    vars_list = [media_vars(q_, '-mid' in message.flags) for q_ in queries]
+    results = await batch_lookup("Media", MEDIA_FIELDS, vars_list)
+    if '-c' in message.flags:
+        pages = []
+        for data, error in results:
+            if data:
+                pages.append(_anime_page(data)[0])
+            else:
+                pages.append(f"<h3>[{error}]</h3>")
+        link = await post_to_tp("Anime Search", "<br><hr><br>".join(pages))
+        await message.edit(f"[Open in Telegraph]({link})")
         return
+    for q_, (data, error) in zip(queries, results):
+        if not data:
+            if len(queries) == 1:
+                await message.err(f"[{error}]")
+                return
+            await message.reply(f"`[{error}] {q_}`")
+            continue
+        html_pc, title_img, title_h, c_flag = _anime_page(data)
+        synopsis_link = await post_to_tp(title_h, html_pc)
+        finals_ = _anime_caption(data, c_flag, synopsis_link, html_pc, title_h)
+        if '-wp' in message.flags:
+            finals_ = f"[\u200b]({title_img}) {finals_}"
+            if len(queries) == 1:
+                await message.edit(finals_)
+                return
+            await message.reply(finals_)
+            continue
+        await message.reply_photo(title_img, caption=finals_)
+    await message.delete()
 
-    data = result['data']['Media']
 
-    # Data of all fields in returned json
-    # pylint: disable=possibly-unused-variable
-    idm = data.get('id')
+def _anime_page(data):
+    """ Telegraph HTML of an Anime, returns (html, image, title, flag) """
     idmal = data.get('idMal')
     romaji = data['title']['romaji']
     english = data['title']['english']
     native = data['title']['native']
-    formats = data.get('format')
-    status = data.get('status')
     synopsis = data.get('description')
-    season = data.get('season')
-    episodes = data.get('episodes')
-    duration = data.get('duration')
-    country = data.get('countryOfOrigin')
-    c_flag = cflag.flag(country)
-    source = data.get('source')
+    c_flag = cflag.flag(data.get('countryOfOrigin'))
     coverImg = data.get('coverImage')['extraLarge']
     bannerImg = data.get('bannerImage')
-    genres = data.get('genres')
-    genre = genres[0]
-    if len(genres) != 1:
-        genre = ", ".join(genres)
-    score = data.get('averageScore')
-    air_on = None
-    if data['nextAiringEpisode']:
-        nextAir = data['nextAiringEpisode']['airingAt']
-        air_on = make_it_rw(nextAir)
     s_date = data.get('startDate')
-    adult = data.get('isAdult')
-    trailer_link = "N/A"
-
-    if data['trailer'] and data['trailer']['site'] == 'youtube':
-        trailer_link = f"[Trailer](https://youtu.be/{data['trailer']['id']})"
     html_char = ""
     for character in data['characters']['nodes']:
         html_ = ""
@@ -328,56 +400,92 @@ async def anim_arch(message: Message):
     html_pc += f"<a href='https://myanimelist.net/anime/{idmal}'>View on MAL</a>"
     html_pc += f"<a href='{url}'> View on anilist.co</a>"
     html_pc += f"<img src='{bannerImg}'/>"
+    return html_pc, title_img, english or romaji, c_flag
 
-    title_h = english or romaji
-    synopsis_link = post_to_tp(title_h, html_pc)
-    try:
-        finals_ = ANIME_TEMPLATE.format(**locals())
-    except KeyError as kys:
-        await message.err(kys)
-        return
 
-    if '-wp' in message.flags:
-        finals_ = f"[\u200b]({title_img}) {finals_}"
-        await message.edit(finals_)
-        return
-    await message.reply_photo(title_img, caption=finals_)
-    await message.delete()
+def _anime_caption(data, c_flag, synopsis_link, html_pc="", title_h=""):
+    """ Format an Anime with ANIME_TEMPLATE, or the default one if a saved
+    Template uses Keys that don't exist """
+    # Data of all fields in returned json
+    # pylint: disable=possibly-unused-variable
+    idm = data.get('id')
+    idmal = data.get('idMal')
+    romaji = data['title']['romaji']
+    english = data['title']['english']
+    native = data['title']['native']
+    formats = data.get('format')
+    status = data.get('status')
+    synopsis = data.get('description')
+    season = data.get('season')
+    episodes = data.get('episodes')
+    duration = data.get('duration')
+    country = data.get('countryOfOrigin')
+    source = data.get('source')
+    coverImg = data.get('coverImage')['extraLarge']
+    bannerImg = data.get('bannerImage')
+    genres = data.get('genres')
+    genre = genres[0]
+    if len(genres) != 1:
+        genre = ", ".join(genres)
+    score = data.get('averageScore')
+    air_on = None
+    if data['nextAiringEpisode']:
+        nextAir = data['nextAiringEpisode']['airingAt']
+        air_on = make_it_rw(nextAir)
+    s_date = data.get('startDate')
+    adult = data.get('isAdult')
+    trailer_link = "N/A"
+
+    if data['trailer'] and data['trailer']['site'] == 'youtube':
+        trailer_link = f"[Trailer](https://youtu.be/{data['trailer']['id']})"
+    url = data.get('siteUrl')
+    title_img = coverImg or bannerImg
+    # Keys older Templates may use
+    studios = "".join(f"<a href='{studio['siteUrl']}'>• {studio['name']}</a> "
+                      for studio in (data.get('studios') or {}).get('nodes') or [])
+    title_h = title_h or english or romaji
+    fields = locals()
+    try:
+        return ANIME_TEMPLATE.format(**fields)
+    except (KeyError, IndexError, ValueError) as t_e:
+        LOG.warning(f"Saved Anime Template can't be used: {t_e!r}")
+        return DEFAULT_ANIME_TEMPLATE.format(**fields)
 
 
 @paimon.on_cmd("airing", about={
     'header': "Airing Info",
-    'description': "Fetch Airing Detail of a Anime",
+    'description': "Fetch Airing Detail of a Anime, "
+                   "separate multiple Titles or IDs with ;",
     'usage': "{tr}airing [Anime Name | Anilist ID]",
-    'examples': "{tr}airing 108632"})
+    'examples': ["{tr}airing 108632", "{tr}airing 108632; One Piece"]})
 async def airing_anim(message: Message):
     """ Get Airing Detail of Anime """
     query = message.input_str
     if not query:
         await message.err("NameError: 'query' not defined")
         return
-    vars_ = {
-        'search': query,
-        'asHtml': True,
-        'type': "ANIME"
-    }
-    if query.isdigit():
-        vars_ = {
-            'id': int(query),
-            'asHtml': True,
-            'type': "ANIME"
-        }
-    result = await return_json_senpai(ANIME_QUERY, vars_)
-    error = result.get('errors')
-    if error:
-        await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n`{error}`")
-        error_sts = error[0].get('message')
-        await message.err(f"[{error_sts}]")
-        return
+    queries = split_queries(query)
+    results = await batch_lookup("Media", MEDIA_FIELDS, [media_vars(q_) for q_ in queries])
+    for q_, (data, error) in zip(queries, results):
+        if not data:
+            if len(queries) == 1:
+                await message.err(f"[{error}]")
+                return
+            await message.reply(f"`[{error}] {q_}`")
+            continue
+        out, coverImg = _airing_caption(data)
+        if len(out) > 1024:
+            if len(queries) == 1:
+                await message.edit(out)
+                return
+            await message.reply(out)
+            continue
+        await message.reply_photo(coverImg, caption=out)
+    await message.delete()
 
-    data = result['data']['Media']
 
-    # Airing Details
+def _airing_caption(data):
+    """ Airing Details of an Anime, returns (caption, cover) """
     mid = data.get('id')
     romaji = data['title']['romaji']
     english = data['title']['english']
@@ -409,88 +517,238 @@ async def airing_anim(message: Message):
     if air_on:
         out += f"**Airing Episode:** `[{episode}/{episodes}]`\n"
         out += f"\n`{air_on}`"
-    if len(out) > 1024:
-        await message.edit(out)
-        return
-    await message.reply_photo(coverImg, caption=out)
-    await message.delete()
+    return out, coverImg
+
+
+async def refresh_schedule(max_pages=None):
+    """ Page through upcoming Airing Schedules into the local Index,
+    all of them or only the first ``max_pages`` Pages """
+    page = 1
+    while True:
+        result = await _anilist_post(SCHEDULE_QUERY, {'page': page})
+        error = result.get('errors')
+        if error:
+            await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n{error}")
+            return False
+        data = result['data']['Page']
+        updates = [
+            UpdateOne({'_id': air['id']}, {"$set": {
+                'airingAt': air['airingAt'],
+                'episode': air['episode'],
+                'mediaId': air['mediaId'],
+                'title': air['media']['title']['english']
+                or air['media']['title']['romaji'],
+                'siteUrl': air['media']['siteUrl']
+            }}, upsert=True)
+            for air in data['airingSchedules']
+        ]
+        if updates:
+            await SCHEDULE.bulk_write(updates, ordered=False)
+        if not data['pageInfo']['hasNextPage'] or page == max_pages:
+            break
+        page += 1
+    await SCHEDULE.delete_many({'airingAt': {'$lt': int(time.time()) - SCHEDULE_KEEP}})
+    _SCHEDULE_CHANGED.set()
+    return True
+
+
+@paimon.add_task
+async def _schedule_worker():
+    while True:
+        _SCHEDULE_SYNC.clear()
+        try:
+            await refresh_schedule()
+        except Exception as e_x:  # pylint: disable=broad-except
+            LOG.error(e_x)
+        try:
+            # .scheduled -r asks for a full Sync earlier
+            await asyncio.wait_for(_SCHEDULE_SYNC.wait(), SCHEDULE_REFRESH)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _due_queue():
+    """ Build the Timer Queue of not yet notified Episodes of tracked Shows """
+    tracked = await NOTIFY.distinct('mediaId')
+    queue = []
+    if tracked:
+        async for air in SCHEDULE.find(
+                {'mediaId': {'$in': tracked}, 'notified': {'$ne': True}}):
+            queue.append((air['airingAt'], air['_id'], air))
+    heapq.heapify(queue)
+    return queue
+
+
+async def _notify_aired(air):
+    """ Post an aired Episode to every Chat tracking the Show """
+    text = (f"📺 **{air['title']}**\n"
+            f"Episode `{air['episode']}` has aired!\n"
+            f"[Visit on anilist.co]({air['siteUrl']})")
+    async for sub_ in NOTIFY.find({'mediaId': air['mediaId'],
+                                   'since': {'$lte': air['airingAt']}}):
+        try:
+            await paimon.send_message(sub_['chat_id'], text,
+                                      disable_web_page_preview=True)
+        except Exception as e_x:  # pylint: disable=broad-except
+            LOG.error(e_x)
+    await SCHEDULE.update_one({'_id': air['_id']}, {"$set": {'notified': True}})
+
+
+@paimon.add_task
+async def _airing_notifier():
+    # one shared timer queue for all tracked Shows, rebuilt whenever
+    # the Index or the Subscriptions change
+    while True:
+        _SCHEDULE_CHANGED.clear()
+        try:
+            queue = await _due_queue()
+            while queue and queue[0][0] <= time.time():
+                await _notify_aired(heapq.heappop(queue)[2])
+        except Exception as e_x:  # pylint: disable=broad-except
+            LOG.error(e_x)
+            queue = []
+        timeout = min(queue[0][0] - time.time(), SCHEDULE_REFRESH) if queue else None
+        try:
+            await asyncio.wait_for(_SCHEDULE_CHANGED.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
 
 
 @paimon.on_cmd("scheduled", about={
     'header': "Scheduled Animes",
-    'description': "Fetch a list of Scheduled Animes from "
-                   "AniList API. [<b>Note:</b> If Query exceeds "
-                   "Limit (i.e. 9 aprox) remaining Animes from "
-                   "will be directly posted to Log Channel "
-                   "to avoid Spam of Current Chat.]",
-    'usage': "{tr}scheduled"})
+    'description': "List Anime Episodes airing in the next 7 days from the "
+                   "local Schedule Index, which is synced with AniList in Background.",
+    'flags': {'-r': "Re-sync the Index"},
+    'usage': "{tr}scheduled\n{tr}scheduled -r"})
 async def get_schuled(message: Message):
     """ Get List of Scheduled Anime """
-    var = {'notYetAired': True}
+    now = int(time.time())
+    window = {'airingAt': {'$gt': now, '$lte': now + SCHEDULE_WINDOW}}
+    if '-r' in message.flags or not await SCHEDULE.find_one(window):
+        await message.edit("`Syncing Scheduled Animes`")
+        # only the soonest Page here, the Background Task syncs the rest
+        # instead of holding the Command (and the AniList Bucket)
+        if not await refresh_schedule(max_pages=1):
+            await message.err("[AniList Error, check Log Channel]")
+            return
+        if '-r' in message.flags:
+            _SCHEDULE_SYNC.set()
     await message.edit("`Fetching Scheduled Animes`")
-    result = await return_json_senpai(AIRING_QUERY, var)
-    error = result.get('errors')
-    if error:
-        await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n{error}")
-        error_sts = error[0].get('message')
-        await message.err(f"[{error_sts}]")
-        return
-
-    data = result['data']['Page']['airingSchedules']
+    total = await SCHEDULE.count_documents(window)
     c = 0
-    totl_schld = len(data)
     out = ""
-    for air in data:
-        romaji = air['media']['title']['romaji']
-        english = air['media']['title']['english']
-        mid = air['mediaId']
-        epi_air = air['episode']
+    async for air in SCHEDULE.find(window).sort('airingAt', 1).limit(SCHEDULE_LIMIT):
         air_at = make_it_rw(air['airingAt'], True)
-        site = air['media']['siteUrl']
-        title_ = english or romaji
-        out += f"<h3>[🇯🇵]{title_}</h3>"
-        out += f" • <b>ID:</b> {mid}<br>"
-        out += f" • <b>Airing Episode:</b> {epi_air}<br>"
+        out += f"<h3>[🇯🇵]{air['title']}</h3>"
+        out += f" • <b>ID:</b> {air['mediaId']}<br>"
+        out += f" • <b>Airing Episode:</b> {air['episode']}<br>"
         out += f" • <b>Next Airing:</b> {air_at}<br>"
-        out += f" • <a href='{site}'>[Visit on anilist.co]</a><br><br>"
+        out += f" • <a href='{air['siteUrl']}'>[Visit on anilist.co]</a><br><br>"
         c += 1
     if out:
-        out_p = f"<h1>Showing [{c}/{totl_schld}] Scheduled Animes:</h1><br><br>{out}"
-        link = post_to_tp("Scheduled Animes", out_p)
+        out_p = f"<h1>Showing [{c}/{total}] Scheduled Animes:</h1><br><br>{out}"
+        link = await post_to_tp("Scheduled Animes", out_p)
         await message.edit(f"[Open in Telegraph]({link})")
+    else:
+        await message.err("No Scheduled Animes found")
+
+
+@paimon.on_cmd("anotify", about={
+    'header': "Airing Notifications",
+    'description': "Get notified in this Chat when a new Episode "
+                   "of an Anime airs",
+    'flags': {'-d': "Stop tracking the Anime",
+              '-l': "List Animes tracked in this Chat"},
+    'usage': "{tr}anotify [AniList ID]\n{tr}anotify -d [AniList ID]\n{tr}anotify -l",
+    'examples': "{tr}anotify 21"})
+async def airing_notify(message: Message):
+    """ Track an Anime for Airing Notifications """
+    chat_id = message.chat.id
+    if '-l' in message.flags:
+        out = ""
+        async for sub_ in NOTIFY.find({'chat_id': chat_id}):
+            out += f"• `{sub_['mediaId']}` {sub_.get('title', '')}\n"
+        await message.edit(f"**Tracked Animes:**\n\n{out}" if out
+                           else "`No Animes tracked in this Chat`", del_in=15)
+        return
+    query = message.filtered_input_str
+    if not query or not query.isdigit():
+        await message.err("Give an AniList ID, e.g. `21`")
+        return
+    media_id = int(query)
+    _id = f"{chat_id}:{media_id}"
+    if '-d' in message.flags:
+        if (await NOTIFY.delete_one({'_id': _id})).deleted_count:
+            _SCHEDULE_CHANGED.set()
+            await message.edit(f"`Stopped tracking {media_id}`", del_in=5)
+        else:
+            await message.err(f"{media_id} is not tracked here")
+        return
+    air = await SCHEDULE.find_one({'mediaId': media_id})
+    await NOTIFY.update_one(
+        {'_id': _id},
+        {"$set": {'chat_id': chat_id, 'mediaId': media_id,
+                  'title': air['title'] if air else ""},
+         "$setOnInsert": {'since': int(time.time())}},
+        upsert=True)
+    _SCHEDULE_CHANGED.set()
+    await message.edit(f"`Tracking {air['title'] if air else media_id}, "
+                       "you will be notified when new Episodes air`", del_in=5)
 
 
 @paimon.on_cmd("character", about={
     'header': "Anime Character",
-    'description': "Get Info about a Character and much more",
+    'description': "Get Info about a Character and much more, "
+                   "separate multiple Names with ;",
+    'flags': {'-c': "Post all Results in one Telegraph Page"},
     'usage': "{tr}character [Name of Character]",
-    'examples': "{tr}character Subaru Natsuki"})
+    'examples': ["{tr}character Subaru Natsuki",
+                 "{tr}character Subaru Natsuki; Emilia"]})
 async def character_search(message: Message):
     """ Get Info about a Character """
-    query = message.input_str
+    query = message.filtered_input_str
     if not query:
         await message.err("NameError: 'query' not defined")
         return
-    var = {
-        'search': query,
-        'asHtml': True
-    }
-    result = await return_json_senpai(CHARACTER_QUERY, var)
-    error = result.get('errors')
-    if error:
-        await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n`{error}`")
-        error_sts = error[0].get('message')
-        await message.err(f"[{error_sts}]")
+    queries = split_queries(query)
+    results = await batch_lookup(
+        "Character", CHARACTER_FIELDS, [{'search': q_} for q_ in queries])
+    if '-c' in message.flags:
+        pages = []
+        for data, error in results:
+            pages.append(_character_page(data) if data else f"<h3>[{error}]</h3>")
+        link = await post_to_tp("Character Search", "<br><hr><br>".join(pages))
+        await message.edit(f"[Open in Telegraph]({link})")
         return
+    for q_, (data, error) in zip(queries, results):
+        if not data:
+            if len(queries) == 1:
+                await message.err(f"[{error}]")
+                return
+            await message.reply(f"`[{error}] {q_}`")
+            continue
+        id_ = data['id']
+        name = data['name']['full']
+        native = data['name']['native']
+        img = data['image']['large']
+        site_url = data['siteUrl']
+        url_ = await post_to_tp(name, _character_page(data))
+        cap_text = f"""[🇯🇵] __{native}__
+    (`{name}`)
+**ID:** {id_}
+[About Character]({url_})
 
-    data = result['data']['Character']
+[Visit Website]({site_url})"""
+
+        await message.reply_photo(img, caption=cap_text)
+    await message.delete()
 
-    # Character Data
-    id_ = data['id']
+
+def _character_page(data):
+    """ Telegraph HTML of a Character """
     name = data['name']['full']
     native = data['name']['native']
     img = data['image']['large']
-    site_url = data['siteUrl']
     description = data['description']
     featured = data['media']['nodes']
 
@@ -522,16 +780,153 @@ async def character_search(message: Message):
         html_cntnt += "<h2>Top Featured Anime</h2>"
         html_cntnt += cntnt
         html_cntnt += "<br><br>"
-    url_ = post_to_tp(name, html_cntnt)
-    cap_text = f"""[🇯🇵] __{native}__
-    (`{name}`)
-**ID:** {id_}
-[About Character]({url_})
+    return html_cntnt
+
+
+@paimon.on_cmd("reverse", about={
+    'header': "Reverse Search Anime",
+    'description': "Find the Anime, Episode and Scene of a Screenshot, "
+                   "GIF or Clip using trace.moe. Several Frames of a Clip "
+                   "are searched and the best Match is voted.",
+    'usage': "{tr}reverse [reply to Photo | Sticker | GIF | Video]"})
+async def trace_bek(message: Message):
+    """ Reverse Search Anime Clips/Photos """
+    replied = message.reply_to_message
+    if not (replied and (replied.photo or replied.sticker or replied.animation
+                         or replied.video or replied.video_note)):
+        await message.err("Reply to a Photo, Sticker, GIF or Video")
+        return
+    # the same Media posted again is found by its Id, without a Download
+    media_key = f"media:{media_cache.unique_id(replied)}"
+    found = await _REVERSED.get(media_key)
+    if not isinstance(found, dict):
+        with Workspace("reverse") as work:
+            async with media_cache.fetch(replied, message, "`Downloading Media`") as dls:
+                found = await _reverse_media(message, replied, dls, work)
+        if not found:
+            return
+        await _REVERSED.set(media_key, found)
+    await message.reply_photo(found['image'], caption=found['caption'])
+    await message.delete()
 
-[Visit Website]({site_url})"""
 
-    await message.reply_photo(img, caption=cap_text)
-    await message.delete()
+async def _reverse_media(message, replied, path, work):
+    """ Reverse Search the downloaded Media, None if it failed """
+    await message.edit("`Sampling Frames`")
+    samples = await _sample_frames(replied, path, work)
+    if not samples:
+        await message.err("Couldn't read any Frame from this Media")
+        return None
+    # re-uploads of it are found by the Hash of the Frames
+    key = "-".join(_dhash(frame) for frame in samples)
+    found = await _REVERSED.get(key)
+    if not isinstance(found, dict):
+        await message.edit(f"`Searching {len(samples)} Frame(s) on trace.moe`")
+        found = await _reverse_lookup(samples)
+        if not found:
+            await message.err("No Match found on trace.moe")
+            return None
+        await _REVERSED.set(key, found)
+    return found
+
+
+async def _sample_frames(replied, path, work):
+    """ Frames to search, clips are sampled evenly in one ffmpeg Pass """
+    if replied.photo:
+        return [path]
+    if replied.sticker and not path.endswith(".webm"):
+        png_file = work.file("frame.png")
+        try:
+            await run_in_process(_save_frame, path, png_file)
+        except (OSError, ProcessCanceled):
+            return []
+        return [png_file]
+    media = replied.animation or replied.video or replied.video_note or replied.sticker
+    duration = max(getattr(media, 'duration', 0) or 1, 1)
+    # the Rate as a Fraction, long Clips would round a Decimal to 0
+    await runcmd(
+        f'ffmpeg -v error -i "{path}" '
+        f'-vf "fps={REVERSE_FRAMES}/{duration},scale=640:-2" '
+        f'-frames:v {REVERSE_FRAMES} "{work.path}/frame_%02d.jpg"'
+    )
+    return sorted(
+        work.file(name) for name in os.listdir(work.path) if name.startswith("frame_")
+    )
+
+
+def _save_frame(path, png_file):
+    first_frame(path).save(png_file, "PNG")
+
+
+def _dhash(path, size=8):
+    """ Difference Hash of a Frame, stable across re-encoding and resizing """
+    with Image.open(path) as img:
+        pixels = list(img.convert("L").resize((size + 1, size), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+async def _reverse_lookup(frames):
+    """ Search all Frames, vote on the Match and enrich it from AniList """
+    tracemoe = tracemoepy.AsyncTrace(session=http_client.get_session())
+    limit = asyncio.Semaphore(REVERSE_CONCURRENCY)
+
+    async def _search(frame):
+        async with limit:
+            await ratelimit.acquire("trace.moe")
+            try:
+                return (await tracemoe.search(frame, upload_file=True))['docs']
+            except ServerError as s_e:
+                LOG.error(s_e)
+            except Exception as e_x:  # pylint: disable=broad-except
+                LOG.error(e_x)
+            return []
+
+    results = await asyncio.gather(*map(_search, frames))
+    match = _vote(results)
+    if not match:
+        return None
+    result = await return_json_senpai(
+        ANIME_QUERY, {'id': match['anilist_id'], 'type': "ANIME", 'asHtml': True})
+    data = (result.get('data') or {}).get('Media')
+    if not data:
+        await CLOG.log(f"**ANILIST RETURNED FOLLOWING ERROR:**\n\n{result.get('errors')}")
+        return None
+    html_pc, title_img, title_h, c_flag = _anime_page(data)
+    synopsis_link = await post_to_tp(title_h, html_pc)
+    at_ = int(match['at'])
+    caption = (f"**Reverse Search:** `{match['votes']}/{len(frames)}` Frame(s) agree\n"
+               f"➤ **SIMILARITY:** `{match['similarity'] * 100:.2f}%`\n"
+               f"➤ **SCENE:** `Episode {match.get('episode') or '?'}` "
+               f"at `{at_ // 60:02d}:{at_ % 60:02d}`\n\n")
+    return {'image': title_img,
+            'caption': caption + _anime_caption(
+                data, c_flag, synopsis_link, html_pc, title_h)}
+
+
+def _vote(results):
+    """ Anime most Frames agree on, weighted by Similarity """
+    votes = {}
+    for docs in results:
+        best = {}
+        for doc in docs:
+            aid = doc['anilist_id']
+            if aid not in best or doc['similarity'] > best[aid]['similarity']:
+                best[aid] = doc
+        for aid, doc in best.items():
+            vote = votes.setdefault(aid, {'score': 0, 'votes': 0, 'doc': doc})
+            vote['score'] += doc['similarity']
+            vote['votes'] += 1
+            if doc['similarity'] > vote['doc']['similarity']:
+                vote['doc'] = doc
+    if not votes:
+        return None
+    vote = max(votes.values(), key=lambda v: v['score'])
+    return dict(vote['doc'], votes=vote['votes'])
 
 
 @paimon.on_cmd("setemp", about={
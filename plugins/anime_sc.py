@@ -3,9 +3,10 @@
 # BY code-rgb [https://github.com/code-rgb]
 
 
-import requests
 from paimon import Message, paimon
 from paimon.utils import deEmojify, rand_array
+from resources import http_client
+from resources.breaker import CircuitOpenError
 from validators.url import url
 
 
@@ -113,7 +114,10 @@ async def anime_Scene(message: Message):
     rand_background = rand_array(background)
     text = str(deEmojify(text))
 
-    path = await ddlc(character, rando_face, rando_body, rand_background, text)
+    try:
+        path = await ddlc(character, rando_face, rando_body, rand_background, text)
+    except CircuitOpenError as c_e:
+        return await message.err(str(c_e))
     if path == "ERROR":
         return await message.edit("😔 Something Wrong see Help!", del_in=2)
     chat_id = message.chat.id
@@ -126,8 +130,10 @@ async def anime_Scene(message: Message):
 
 async def ddlc(text1, text2, text3, text4, text5):
     site = "https://nekobot.xyz/api/imagegen?type=ddlc&character="
-    r = requests.get(
-        f"{site}{text1}&face={text2}&body={text3}&background={text4}&text={text5}"
+    r = (
+        await http_client.get(
+            f"{site}{text1}&face={text2}&body={text3}&background={text4}&text={text5}"
+        )
     ).json()
     urlx = r.get("message")
     anim_url = url(urlx)
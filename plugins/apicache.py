@@ -0,0 +1,35 @@
+""" View and clear the API response caches """
+
+from paimon import Message, paimon
+from resources.cache import CACHES
+
+
+@paimon.on_cmd(
+    "apicache",
+    about={
+        "header": "API Response Cache",
+        "description": "Show hit / miss counters of the cached API lookups "
+        "(anime, imdb, watch, github, app, magisk, twrp ...)",
+        "flags": {"-c": "clear all caches"},
+        "usage": "{tr}apicache\n{tr}apicache -c",
+    },
+)
+async def api_cache(message: Message):
+    """ api cache stats """
+    if "-c" in message.flags:
+        for cache in CACHES.values():
+            await cache.clear()
+        await message.edit("`API caches cleared`", del_in=5)
+        return
+    if not CACHES:
+        await message.edit("`No API cache in use yet`", del_in=5)
+        return
+    out = "**API Cache Stats**\n\n"
+    for name, cache in CACHES.items():
+        total = cache.hits + cache.misses
+        ratio = round(cache.hits * 100 / total) if total else 0
+        out += (
+            f"• **{name}** : `{len(cache)}/{cache.maxsize}` entries, "
+            f"`{cache.hits}` hits, `{cache.misses}` misses (`{ratio}%`)\n"
+        )
+    await message.edit(out)
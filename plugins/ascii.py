@@ -3,21 +3,30 @@
 # Copyright 2017, Shanshan Wang, MIT license
 # Based on https://gist.github.com/wshanshan/c825efca4501a491447056849dd207d6
 
-import os
 import random
+from functools import lru_cache
 
 import numpy as np
 from colour import Color
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-from paimon import Config, Message, paimon
-from paimon.utils import media_to_image
+from PIL import Image, ImageColor, ImageDraw, ImageFont, ImageOps
+from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import ffpipe, frames, media_cache
+from resources.memfile import to_file
+from resources.process_pool import PROCESS_WORKERS, run_in_process
+from resources.workspace import Workspace
+
+CHARS = " .,:irs?@9B&#"
+# letters per row of ascii videos, keeps the frame size sane
+ASCII_VIDEO_COLS = 120
 
 
 @paimon.on_cmd(
     "ascii",
     about={
         "header": "Ascii Image",
-        "description": "transform on any Media to an Ascii Image. ",
+        "description": "transform on any Media to an Ascii Image, "
+        "gifs and videos become Ascii Videos. ",
         "usage": " {tr}ascii [reply to media]",
         "flags": {"-alt": "To get inverted Ascii Image"},
         "examples": ["{tr}ascii [reply to media]", "{tr}ascii -alt [reply to media]"],
@@ -30,14 +39,41 @@ async def ascii_(message: Message):
         await message.reply_sticker("CAADAQADhgADwKwII4f61VT65CNGFgQ")
         return
     ascii_type = "alt" if "-alt" in message.flags else ""
-    dls_loc = await media_to_image(message)
-    if not dls_loc:
-        return
     c_list = random_color()
     color1 = c_list[0]
     color2 = c_list[1]
     bgcolor = "#080808"
-    img_file = asciiart(dls_loc, 0.3, 1.9, color1, color2, bgcolor, ascii_type)
+    if replied.animation or replied.video:
+        await message.edit("```Converting to Ascii Video...```")
+        async with media_cache.fetch(replied, message) as dls:
+            with Workspace("ascii") as work:
+                try:
+                    video = await ascii_clip(
+                        message, dls, work.file("ascii.mp4"), color1, color2, bgcolor,
+                        ascii_type)
+                except ProcessCanceled as p_c:
+                    await message.err(str(p_c), del_in=5)
+                    return
+                if not video:
+                    await message.err("```Couldn't read this Media...```", del_in=5)
+                    return
+                await message.client.send_animation(
+                    chat_id=message.chat.id,
+                    animation=video,
+                    reply_to_message_id=replied.message_id,
+                )
+        await message.delete()
+        return
+    async with media_cache.source(message) as dls_loc:
+        if not dls_loc:
+            return
+        try:
+            img_file = await run_in_process(
+                asciiart, dls_loc, 0.3, 1.9, color1, color2, bgcolor, ascii_type,
+                message=message)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            return
     await message.client.send_document(
         chat_id=message.chat.id,
         document=img_file,
@@ -45,45 +81,98 @@ async def ascii_(message: Message):
         reply_to_message_id=replied.message_id,
     )
     await message.delete()
-    os.remove(img_file)
-    os.remove(dls_loc)
 
 
 def asciiart(in_f, SC, GCF, color1, color2, bgcolor, ascii_type):
-    chars = np.asarray(list(" .,:irs?@9B&#"))
+    img = frames.first_frame(in_f)
+    S = grid_size(img.size[0], img.size[1], SC)
+    # jpegs get decoded at a reduced scale close to the letter grid
+    img.draft("RGB", S)
+    img = img.convert("RGB").resize(S)
+    colorRange = color_range(color1, color2, S[1])
+    newImg = Image.fromarray(
+        render_ascii(img, GCF, colorRange, ImageColor.getrgb(bgcolor), ascii_type)
+    )
+    return to_file(newImg, "ascii.png")
+
+
+def ascii_raw(raw, S, GCF, colorRange, bgcolor, ascii_type):
+    """ ascii art of one rgb24 video frame already scaled to the letter grid """
+    img = Image.frombytes("RGB", S, raw)
+    return render_ascii(img, GCF, colorRange, bgcolor, ascii_type).tobytes()
+
+
+@lru_cache(maxsize=1)
+def glyph_atlas():
+    """ every char rasterized once, as (chars, letter height, letter width) masks """
     font = ImageFont.load_default()
-    letter_width = font.getsize("x")[0]
-    letter_height = font.getsize("x")[1]
+    letter_width, letter_height = font.getsize("x")
+    atlas = np.zeros((len(CHARS), letter_height, letter_width), dtype=np.float32)
+    for idx, char in enumerate(CHARS):
+        glyph = Image.new("L", (letter_width, letter_height))
+        ImageDraw.Draw(glyph).text((0, 0), char, 255, font=font)
+        atlas[idx] = np.asarray(glyph, dtype=np.float32) / 255
+    return atlas
+
+
+def grid_size(width, height, SC):
+    """ letters per row and rows of the ascii art """
+    _, letter_height, letter_width = glyph_atlas().shape
     WCF = letter_height / letter_width
-    img = Image.open(in_f)
-    if img.mode != "RGB":
-        img = img.convert("RGB")
+    return max(round(width * SC * WCF), 1), max(round(height * SC), 1)
+
+
+def color_range(color1, color2, nbins):
+    """ row colors, from color1 at the top to color2 at the bottom """
+    return np.array(
+        [color.rgb for color in Color(color1).range_to(Color(color2), nbins)],
+        dtype=np.float32,
+    ) * 255
+
+
+def render_ascii(img, GCF, colorRange, bgcolor, ascii_type):
+    """ tiles glyphs from the atlas by brightness and tints them per row """
     if ascii_type == "alt":
         img = ImageOps.invert(img)
-    widthByLetter = round(img.size[0] * SC * WCF)
-    heightByLetter = round(img.size[1] * SC)
-    S = (widthByLetter, heightByLetter)
-    img = img.resize(S)
-    img = np.sum(np.asarray(img), axis=2)
+    img = np.sum(np.asarray(img, dtype=np.float32), axis=2)
     img -= img.min()
-    img = (1.0 - img / img.max()) ** GCF * (chars.size - 1)
-    lines = ("\n".join(("".join(r) for r in chars[img.astype(int)]))).split("\n")
-    nbins = len(lines)
-    colorRange = list(Color(color1).range_to(Color(color2), nbins))
-    newImg_width = letter_width * widthByLetter
-    newImg_height = letter_height * heightByLetter
-    newImg = Image.new("RGBA", (newImg_width, newImg_height), bgcolor)
-    draw = ImageDraw.Draw(newImg)
-    leftpadding = 0
-    y = 0
-    for lineIdx, line in enumerate(lines):
-        color = colorRange[lineIdx]
-        draw.text((leftpadding, y), line, color.hex, font=font)
-        y += letter_height
-    image_name = "ascii.png"
-    img_file = os.path.join(Config.DOWN_PATH, image_name)
-    newImg.save(img_file)
-    return img_file
+    img = (1.0 - img / (img.max() or 1)) ** GCF * (len(CHARS) - 1)
+    atlas = glyph_atlas()
+    rows, cols = img.shape
+    _, letter_height, letter_width = atlas.shape
+    mask = atlas[img.astype(int)].transpose(0, 2, 1, 3).reshape(
+        rows * letter_height, cols * letter_width, 1
+    )
+    tint = np.repeat(colorRange[:rows], letter_height, axis=0)[:, None, :]
+    bgcolor = np.array(bgcolor, dtype=np.float32)
+    return (bgcolor + (tint - bgcolor) * mask).astype(np.uint8)
+
+
+async def ascii_clip(message, src, video, color1, color2, bgcolor, ascii_type):
+    """ ascii video of a gif / video, rendered frame by frame """
+    info = await frames.probe(src)
+    if not info:
+        return None
+    width, height, rate = info
+    _, letter_height, letter_width = glyph_atlas().shape
+    cols = min(ASCII_VIDEO_COLS, grid_size(width, height, 0.3)[0])
+    # odd letter height, so an even number of rows keeps the video even
+    rows = ffpipe.even(round(cols * height * letter_width / (width * letter_height)))
+    S = (cols, rows)
+    colorRange = color_range(color1, color2, rows)
+    bgcolor = ImageColor.getrgb(bgcolor)
+
+    async def _jobs():
+        async for raw in frames.decode(src, S, message=message):
+            yield run_in_process(
+                ascii_raw, raw, S, 1.9, colorRange, bgcolor, ascii_type, message=message
+            )
+
+    done = await ffpipe.encode(
+        ffpipe.ordered(_jobs(), max(PROCESS_WORKERS, 1) * 2),
+        (cols * letter_width, rows * letter_height), rate, video, *ffpipe.H264,
+    )
+    return video if done else None
 
 
 def random_color():
@@ -0,0 +1,36 @@
+""" Prewarm and inspect the rendering asset store, clear stale workspaces """
+
+from paimon import Message, paimon
+from paimon.utils import humanbytes
+from resources import assets, workspace
+
+# fonts of .plet
+FONT_CHANNELS = ("@FontsRes",)
+
+
+async def _init():
+    # runs once in the bot process, before commands are handled
+    workspace.clear_stale()
+
+
+@paimon.add_task
+async def _prewarm_assets():
+    await assets.prewarm(*FONT_CHANNELS)
+
+
+@paimon.on_cmd(
+    "assets",
+    about={
+        "header": "Rendering Assets",
+        "description": "Show the local store of fonts and images "
+        "used by the sticker commands (amongus, plet, mmf, fgs ...)",
+        "usage": "{tr}assets",
+    },
+)
+async def assets_stats(message: Message):
+    """ asset store stats """
+    files, size = assets.stats()
+    await message.edit(
+        f"**Asset Store**\n\n• `{files}` files, `{humanbytes(size)}`\n"
+        f"• `{assets.warmed()}` preloaded by every process pool worker"
+    )
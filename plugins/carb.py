@@ -3,8 +3,8 @@
 # Author: Sumanjay (https://github.com/cyberboysumanjay) (@cyberboysumanjay)
 # All rights reserved.
 
-import requests
 from paimon import Message, paimon
+from resources import http_client
 
 
 @paimon.on_cmd(
@@ -107,9 +107,11 @@ async def carb(message: Message):
         return
     await message.edit("⚡️ Carbonizing ⚡️")
     try:
-        carbon_result = requests.get(
-            "https://sjprojectsapi.herokuapp.com/carbon/?"
-            f"text={text}&theme={theme}&bg={bg}"
+        carbon_result = (
+            await http_client.get(
+                "https://sjprojectsapi.herokuapp.com/carbon/",
+                params={"text": text, "theme": theme, "bg": bg},
+            )
         ).json()
         await message.client.send_photo(
             chat_id=message.chat.id, photo=carbon_result["link"]
@@ -3,7 +3,6 @@
 
 import asyncio
 import html
-import os
 
 from pyrogram.errors import (
     BadRequest,
@@ -12,12 +11,11 @@ from pyrogram.errors import (
     UsernameNotOccupied,
     UsernameOccupied,
 )
-from paimon import Config, Message, paimon
+from paimon import Message, paimon
+from resources import media_cache
 
 LOG = paimon.getLogger(__name__)
 
-PATH = Config.DOWN_PATH + "chat_pic.jpg"
-
 
 def mention_html(user_id, name):
     return '<a href="tg://user?id={}">{}</a>'.format(user_id, html.escape(name))
@@ -334,10 +332,10 @@ async def view_chat(message: Message):
             await message.err("```Chat not have photo... ```", del_in=3)
         else:
             await message.edit("```Checking chat photo, wait plox !...```", del_in=3)
-            await message.client.download_media(chat.photo.big_file_id, file_name=PATH)
-            await message.client.send_photo(message.chat.id, PATH)
-            if os.path.exists(PATH):
-                os.remove(PATH)
+            async with media_cache.fetch_file(
+                    message.client, chat.photo.big_file_id,
+                    chat.photo.big_file_unique_id) as photo:
+                await message.client.send_photo(message.chat.id, photo)
 
 
 @paimon.on_cmd(
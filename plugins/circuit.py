@@ -0,0 +1,31 @@
+""" Circuit breaker state of the third-party APIs """
+
+from paimon import Message, paimon
+from resources.breaker import BREAKERS, OPEN
+
+
+@paimon.on_cmd(
+    "breakers",
+    about={
+        "header": "API Circuit Breakers",
+        "description": "Show which third-party APIs are failing fast "
+        "after repeated errors (nekobot, carbon, deepai, wit.ai ...)",
+        "flags": {"-r": "reset all breakers"},
+        "usage": "{tr}breakers\n{tr}breakers -r",
+    },
+)
+async def circuit_breakers(message: Message):
+    """ circuit breaker states """
+    if "-r" in message.flags:
+        for breaker in BREAKERS.values():
+            breaker.reset()
+        await message.edit("`All circuit breakers closed`", del_in=5)
+        return
+    if not BREAKERS:
+        await message.edit("`No API called yet`", del_in=5)
+        return
+    out = "**API Circuit Breakers**\n\n"
+    for name, breaker in sorted(BREAKERS.items()):
+        icon = "🔴" if breaker.state == OPEN else "🟢"
+        out += f"{icon} `{name}` : **{breaker.state}** (`{breaker.failures}` failures)\n"
+    await message.edit(out)
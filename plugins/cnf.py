@@ -23,9 +23,9 @@ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 Portions Copyright (c) tl;dr; authors and contributors <https://github.com/tldr-pages/tldr>
 """
 
-import requests
 from bs4 import BeautifulSoup
 from paimon import Message, paimon
+from resources import http_client
 
 
 @paimon.on_cmd(
@@ -43,7 +43,7 @@ async def cnf(message: Message):
 
     if not message.input_str:
         # find a random command
-        page = requests.get(base_url)
+        page = await http_client.get(base_url)
         soup = BeautifulSoup(page.content, "lxml", from_encoding="utf-8")
         cmd = soup.find(
             "a", attrs={"class": "h5 brand-text d-block mb-1 other-command"}
@@ -52,7 +52,7 @@ async def cnf(message: Message):
         cmd = message.input_str.split()[0]
 
     try:
-        page = requests.get(base_url + cmd)
+        page = await http_client.get(base_url + cmd)
         soup = BeautifulSoup(page.content, "lxml", from_encoding="utf-8")
 
         # heading
@@ -1,19 +1,29 @@
 """ deepfry and fry for frying any media """
 
-import os
 import random
+import shutil
+from io import BytesIO
 
-from PIL import Image, ImageEnhance, ImageOps
+import numpy as np
+from PIL import Image, ImageEnhance
 from pyrogram.errors.exceptions.bad_request_400 import YouBlockedUser
-from paimon import Config, Message, paimon
-from paimon.utils import progress, runcmd, take_screen_shot
+from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import ffpipe, frames, media_cache
+from resources.memfile import to_file
+from resources.process_pool import PROCESS_WORKERS, run_in_process
+from resources.workspace import Workspace
+
+# fried frames of a clip in flight at once, bounds memory for long clips
+FRY_QUEUE = max(PROCESS_WORKERS, 1) * 2
 
 
 @paimon.on_cmd(
     "deepfry",
     about={
         "header": "Deep Fryer",
-        "description": "Well deepfy any image/sticker/gif and make it look ugly",
+        "description": "Well deepfy any image/sticker/gif and make it look ugly, "
+        "every frame of gifs and videos gets fried",
         "usage": "{tr}deepfry [fry count] as a reply.",
         "examples": "{tr}deepfry 1",
     },
@@ -34,41 +44,44 @@ async def deepfryer(message: Message):
         fry_c = int(message.input_str)
     except ValueError:
         fry_c = 1
-    if not os.path.isdir(Config.DOWN_PATH):
-        os.makedirs(Config.DOWN_PATH)
     await message.edit("*turns on fryer*")
-    dls = await message.client.download_media(
-        message=message.reply_to_message,
-        file_name=Config.DOWN_PATH,
-        progress=progress,
-        progress_args=(message, "Lemme add some seasonings"),
-    )
-    dls_loc = os.path.join(Config.DOWN_PATH, os.path.basename(dls))
+    if replied.animation or replied.video:
+        async with media_cache.fetch(
+                replied, message, "Lemme add some seasonings") as dls_loc:
+            await message.edit("wait putting some more oil in fryer")
+            with Workspace("deepfry") as work:
+                try:
+                    fried_clip = await fry_clip(message, dls_loc, max(fry_c, 1), work)
+                except ProcessCanceled as p_c:
+                    await message.err(str(p_c), del_in=5)
+                    return
+                if not fried_clip:
+                    await message.err("someone took my oil can't deepfry it.")
+                    return
+                await message.client.send_animation(
+                    chat_id=message.chat.id,
+                    animation=fried_clip,
+                    reply_to_message_id=replied.message_id,
+                )
+        await message.delete()
+        return
+
     if replied.sticker and replied.sticker.file_name.endswith(".tgs"):
         await message.edit("wait fryer is cold naw")
-        png_file = os.path.join(Config.DOWN_PATH, "meme.png")
-        cmd = f"lottie_convert.py --frame 0 -if lottie -of png {dls_loc} {png_file}"
-        stdout, stderr = (await runcmd(cmd))[:2]
-        os.remove(dls_loc)
-        if not os.path.lexists(png_file):
-            await message.err("*boom* fryer exploded, can't deepfry this")
-            raise Exception(stdout + stderr)
-        dls_loc = png_file
-    elif replied.animation or replied.video:
-        await message.edit("wait putting some more oil in fryer")
-        jpg_file = os.path.join(Config.DOWN_PATH, "meme.jpg")
-        await take_screen_shot(dls_loc, 0, jpg_file)
-        os.remove(dls_loc)
-        if not os.path.lexists(jpg_file):
-            await message.err("someone took my oil can't deepfry it.")
+    async with media_cache.source(message) as dls_loc:
+        if not dls_loc:
+            return
+        await message.edit("time to put this in fryer 🔥")
+        try:
+            fried_file = await run_in_process(
+                deepfry, dls_loc, max(fry_c, 1), message=message)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            return
+        except OSError:
+            # PIL couldn't read it, UnidentifiedImageError is an OSError too
+            await message.err("Couldn't read this media, can't deepfry it.", del_in=5)
             return
-        dls_loc = jpg_file
-
-    await message.edit("time to put this in fryer 🔥")
-    fried_file = await deepfry(dls_loc)
-    if fry_c > 1:
-        for _ in range(fry_c):
-            fried_file = await deepfry(fried_file)
 
     await message.client.send_photo(
         chat_id=message.chat.id,
@@ -76,56 +89,95 @@ async def deepfryer(message: Message):
         reply_to_message_id=replied.message_id,
     )
     await message.delete()
-    os.remove(fried_file)
 
 
-async def deepfry(img):
+def deepfry(img, fry_c=1):
+    """ fry an image ``fry_c`` times, all in memory """
+    with frames.first_frame(img) as src:
+        frame = fry_rounds(src.convert("RGB"), fry_c, random.Random())
+    return to_file(frame, "deepfried.jpeg")
 
-    img = Image.open(img)
-    colours = (
-        (random.randint(50, 200), random.randint(40, 170), random.randint(40, 190)),
-        (random.randint(190, 255), random.randint(170, 240), random.randint(180, 250)),
-    )
 
-    img = img.convert("RGB")
+def fry_raw(raw, width, height, fry_c, seed):
+    """ fry one rgb24 frame of a clip, the same seed gives every frame the same look """
+    frame = Image.frombytes("RGB", (width, height), raw)
+    return fry_rounds(frame, fry_c, random.Random(seed)).tobytes()
+
+
+def fry_rounds(frame, fry_c, rng):
+    for count in range(fry_c, 0, -1):
+        frame = fry_frame(frame, rng)
+        if count > 1:
+            # jpeg artifacts are part of the recipe, without a trip to disk
+            frame = jpeg_artifacts(frame)
+    return frame
+
+
+def jpeg_artifacts(frame, quality=75):
+    buf = BytesIO()
+    frame.save(buf, "JPEG", quality=quality)
+    buf.seek(0)
+    return Image.open(buf).convert("RGB")
+
+
+def fry_frame(img, rng):
+    """ one round of frying, vectorized with numpy """
+    colours = np.array((
+        (rng.randint(50, 200), rng.randint(40, 170), rng.randint(40, 190)),
+        (rng.randint(190, 255), rng.randint(170, 240), rng.randint(180, 250)),
+    ), dtype=np.float32)
+
     width, height = img.width, img.height
-    img = img.resize(
-        (
-            int(width ** random.uniform(0.8, 0.9)),
-            int(height ** random.uniform(0.8, 0.9)),
-        ),
-        resample=Image.LANCZOS,
-    )
-    img = img.resize(
-        (
-            int(width ** random.uniform(0.85, 0.95)),
-            int(height ** random.uniform(0.85, 0.95)),
-        ),
-        resample=Image.BILINEAR,
-    )
-    img = img.resize(
-        (
-            int(width ** random.uniform(0.89, 0.98)),
-            int(height ** random.uniform(0.89, 0.98)),
-        ),
-        resample=Image.BICUBIC,
-    )
+    for low, high, resample in (
+        (0.8, 0.9, Image.LANCZOS),
+        (0.85, 0.95, Image.BILINEAR),
+        (0.89, 0.98, Image.BICUBIC),
+    ):
+        img = img.resize(
+            (
+                int(width ** rng.uniform(low, high)),
+                int(height ** rng.uniform(low, high)),
+            ),
+            resample=resample,
+        )
     img = img.resize((width, height), resample=Image.BICUBIC)
-    img = ImageOps.posterize(img, random.randint(3, 7))
 
-    overlay = img.split()[0]
-    overlay = ImageEnhance.Contrast(overlay).enhance(random.uniform(1.0, 2.0))
-    overlay = ImageEnhance.Brightness(overlay).enhance(random.uniform(1.0, 2.0))
+    # posterize
+    bits = rng.randint(3, 7)
+    pixels = np.asarray(img) & np.uint8(0xFF << (8 - bits) & 0xFF)
 
-    overlay = ImageOps.colorize(overlay, colours[0], colours[1])
+    # contrast and brightness of the red channel, colorized as overlay
+    red = pixels[..., 0].astype(np.float32)
+    mean = int(red.mean() + 0.5)
+    red = np.clip(mean + (red - mean) * rng.uniform(1.0, 2.0), 0, 255)
+    red = np.clip(red * rng.uniform(1.0, 2.0), 0, 255)
+    overlay = colours[0] + (colours[1] - colours[0]) * (red[..., None] / 255)
 
-    img = Image.blend(img, overlay, random.uniform(0.1, 0.4))
-    img = ImageEnhance.Sharpness(img).enhance(random.randint(5, 300))
+    alpha = rng.uniform(0.1, 0.4)
+    pixels = pixels * (1 - alpha) + overlay * alpha
+    img = Image.fromarray(pixels.astype(np.uint8))
+    return ImageEnhance.Sharpness(img).enhance(rng.randint(5, 300))
 
-    image_name = "deepfried.jpeg"
-    fried_file = os.path.join(Config.DOWN_PATH, image_name)
-    img.save(fried_file, "JPEG")
-    return fried_file
+
+async def fry_clip(message, src, fry_c, work):
+    """ fry every frame of a gif / video, streamed between two ffmpeg pipes """
+    info = await frames.probe(src)
+    if not info:
+        return None
+    width, height, rate = info
+    size = ffpipe.even(width), ffpipe.even(height)
+    seed = random.randrange(2 ** 32)
+    fried_file = work.file("deepfried.mp4")
+
+    async def _jobs():
+        async for raw in frames.decode(src, size, message=message):
+            yield run_in_process(fry_raw, raw, *size, fry_c, seed, message=message)
+
+    done = await ffpipe.encode(
+        ffpipe.ordered(_jobs(), FRY_QUEUE), size, rate, fried_file,
+        "-i", src, "-map", "0:v", "-map", "1:a?", "-c:a", "copy",
+        *ffpipe.H264, "-shortest")
+    return fried_file if done else None
 
 
 # fry by @krishna_singhal
@@ -141,7 +193,6 @@ async def deepfry(img):
 )
 async def fry_(message: Message):
     """ fryer for any media """
-    frying_file = None
     replied = message.reply_to_message
     if not (replied and message.input_str):
         await message.err(
@@ -159,48 +210,50 @@ async def fry_(message: Message):
     if not 0 < args < 9:
         await message.err("```Invalid range !...```", del_in=5)
         return
-    if not os.path.isdir(Config.DOWN_PATH):
-        os.makedirs(Config.DOWN_PATH)
     await message.edit("```Frying, Wait plox ...```")
-    dls = await message.client.download_media(
-        message=replied,
-        file_name=Config.DOWN_PATH,
-        progress=progress,
-        progress_args=(message, "Downloading to my local"),
-    )
-    dls_loc = os.path.join(Config.DOWN_PATH, os.path.basename(dls))
-    if replied.sticker and replied.sticker.file_name.endswith(".tgs"):
-        await message.edit(
-            "```Ohh nice sticker, Lemme deepfry this Animated sticker ...```"
-        )
-        webp_file = os.path.join(Config.DOWN_PATH, "fry.png")
-        cmd = f"lottie_convert.py --frame 0 -if lottie -of png {dls_loc} {webp_file}"
-        stdout, stderr = (await runcmd(cmd))[:2]
-        if not os.path.lexists(webp_file):
-            await message.err("```Media not found ...```", del_in=5)
-            raise Exception(stdout + stderr)
-        frying_file = webp_file
-    elif replied.animation or replied.video:
+    with Workspace("fry") as work:
+        await _fry(message, replied, args, work)
+
+
+async def _fry(message, replied, args, work):
+    if replied.animation or replied.video:
         if replied.video:
             await message.edit("```Wait bruh, lemme deepfry this video ...```")
         else:
             await message.edit("```What a Gif, Lemme deepfry this ...```")
-        jpg_file = os.path.join(Config.DOWN_PATH, "fry.jpg")
-        await take_screen_shot(dls_loc, 0, jpg_file)
-        if not os.path.lexists(jpg_file):
+        # the bot only fries photos, clips are fried here frame by frame
+        async with media_cache.fetch(replied, message, "Downloading to my local") as dls_loc:
+            try:
+                fried_clip = await fry_clip(message, dls_loc, args, work)
+            except ProcessCanceled as p_c:
+                await message.err(str(p_c), del_in=5)
+                return
+        if not fried_clip:
             await message.err("```Media not found ...```", del_in=5)
             return
-        frying_file = jpg_file
-    elif replied.sticker and replied.sticker.file_name.endswith(".webp"):
+        await paimon.send_animation(
+            message.chat.id,
+            animation=fried_clip,
+            reply_to_message_id=replied.message_id,
+        )
+        await message.delete()
+        return
+    if replied.sticker and replied.sticker.file_name.endswith(".tgs"):
+        await message.edit(
+            "```Ohh nice sticker, Lemme deepfry this Animated sticker ...```"
+        )
+    elif replied.sticker:
         await message.edit("```Lemme deepfry this Sticker, wait plox ...```")
-        png_file = os.path.join(Config.DOWN_PATH, "fry.jpg")
-        os.rename(dls_loc, png_file)
-        if not os.path.lexists(png_file):
-            await message.err("```Media not found ...```", del_in=5)
+    async with media_cache.still_image(message) as frying_file:
+        if not frying_file:
             return
-        frying_file = png_file
-    if frying_file is None:
-        frying_file = dls_loc
+        if frying_file.endswith(".webp"):
+            # the bot takes the sticker as a photo under a jpg name
+            frying_file = shutil.copyfile(frying_file, work.file("fry.jpg"))
+        await _fry_bot(message, replied, args, frying_file, work)
+
+
+async def _fry_bot(message, replied, args, frying_file, work):
     chat = "@image_deepfrybot"
     async with paimon.conversation(chat) as conv:
         try:
@@ -224,11 +277,8 @@ async def fry_(message: Message):
             await message.err("Bot is Down, try to restart Bot !...", del_in=5)
             return
         message_id = replied.message_id
-        deep_fry = None
         if response.photo:
-            directory = Config.DOWN_PATH
-            files_name = "fry.webp"
-            deep_fry = os.path.join(directory, files_name)
+            deep_fry = work.file("fry.webp")
             await paimon.download_media(message=response, file_name=deep_fry)
             await paimon.send_sticker(
                 message.chat.id,
@@ -236,6 +286,3 @@ async def fry_(message: Message):
                 reply_to_message_id=message_id,
             )
     await message.delete()
-    for garb in (dls_loc, frying_file, deep_fry):
-        if garb and os.path.exists(garb):
-            os.remove(garb)
@@ -4,11 +4,22 @@
 # TG ~>>//@CharonCB21
 
 import asyncio
-import os
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw
 from paimon import Message, paimon
-from wget import download
+from paimon.utils.exceptions import ProcessCanceled
+from resources import assets
+from resources.memfile import to_file
+from resources.process_pool import run_in_process
+from resources.textfit import fit_font
+
+TEMPLATE = "https://i.imgur.com/wNFr5X2.jpg"
+RESULT_FONT = "resources/ProductSans-BoldItalic.ttf"
+SEARCH_FONT = "resources/ProductSans-Light.ttf"
+
+assets.register(TEMPLATE)
+assets.register(RESULT_FONT, 20)
+assets.register(SEARCH_FONT, 23)
 
 
 @paimon.on_cmd(
@@ -31,21 +42,27 @@ async def FakeGoogleSearch(message: Message):
 
     await message.edit("Connecting to `https://www.google.com/` ...")
     await asyncio.sleep(2)
-    img = "https://i.imgur.com/wNFr5X2.jpg"
-    r = download(img)
-    photo = Image.open(r)
-    drawing = ImageDraw.Draw(photo)
-    blue = (0, 0, 255)
-    black = (0, 0, 0)
-    font1 = ImageFont.truetype("resources/ProductSans-BoldItalic.ttf", 20)
-    font2 = ImageFont.truetype("resources/ProductSans-Light.ttf", 23)
-    drawing.text((450, 258), result, fill=blue, font=font1)
-    drawing.text((270, 37), search, fill=black, font=font2)
-    photo.save("downloads/test.jpg")
+    r = await assets.fetch(TEMPLATE)
+    try:
+        photo = await run_in_process(draw_fake_gs, r, search, result, message=message)
+    except ProcessCanceled as p_c:
+        return await message.err(str(p_c), del_in=5)
     reply = message.reply_to_message
     await message.delete()
     reply_id = reply.message_id if reply else None
     await message.client.send_photo(
-        message.chat.id, "downloads/test.jpg", reply_to_message_id=reply_id
+        message.chat.id, photo, reply_to_message_id=reply_id
     )
-    os.remove("downloads/test.jpg")
+
+
+def draw_fake_gs(r, search, result):
+    photo = assets.open_image(r).copy()
+    drawing = ImageDraw.Draw(photo)
+    blue = (0, 0, 255)
+    black = (0, 0, 0)
+    # long texts shrink to stay inside the template
+    font1 = fit_font(RESULT_FONT, result, (photo.width - 470, 40), 20)
+    font2 = fit_font(SEARCH_FONT, search, (photo.width - 290, 40), 23)
+    drawing.text((450, 258), result, fill=blue, font=font1)
+    drawing.text((270, 37), search, fill=black, font=font2)
+    return to_file(photo, "fgs.jpg")
@@ -15,13 +15,14 @@ import re
 from mimetypes import guess_type
 
 import aiofiles
-import aiohttp
+from aiohttp import ClientTimeout
 from apiclient.discovery import build
 from httplib2 import Http
 from oauth2client import client, file
 from paimon import Config, Message, paimon
 from paimon.plugins.misc.download import tg_download, url_download
 from paimon.utils import progress
+from resources.http_client import get_session
 
 # setup the gPhotos v1 API
 OAUTH_SCOPE = [
@@ -31,6 +32,8 @@ OAUTH_SCOPE = [
 # Redirect URI for installed apps, can be left as is
 REDIRECT_URI = "urn:ietf:wg:oauth:2.0:oob"
 PHOTOS_BASE_URI = "https://photoslibrary.googleapis.com"
+# chunked uploads can take far longer than the shared default timeout
+UPLOAD_TIMEOUT = ClientTimeout(total=None, sock_connect=30)
 
 G_PHOTOS_CLIENT_ID = os.environ.get(
     "G_PHOTOS_CLIENT_ID", os.environ.get("G_DRIVE_CLIENT_ID", None)
@@ -140,77 +143,85 @@ async def upload_google_photos(message: Message):
     service = build("photoslibrary", "v1", http=creds.authorize(Http()))
     file_name, mime_type, file_size = file_ops(path_)
     await message.edit_text("file downloaded, gathering upload informations ")
-    async with aiohttp.ClientSession() as session:
-        headers = {
-            "Content-Length": "0",
-            "X-Goog-Upload-Command": "start",
-            "X-Goog-Upload-Content-Type": mime_type,
-            "X-Goog-Upload-File-Name": file_name,
-            "X-Goog-Upload-Protocol": "resumable",
-            "X-Goog-Upload-Raw-Size": str(file_size),
-            "Authorization": "Bearer " + creds.access_token,
-        }
-        # Step 1: Initiating an upload session
-        step_one_response = await session.post(
-            f"{PHOTOS_BASE_URI}/v1/uploads", headers=headers
-        )
-        if step_one_response.status != 200:
-            await message.edit_text((await step_one_response.text()))
-            return
-        step_one_resp_headers = step_one_response.headers
-        # LOG.info(step_one_resp_headers)
-        # Step 2: Saving the session URL
-        real_upload_url = step_one_resp_headers.get("X-Goog-Upload-URL")
-        # LOG.info(real_upload_url)
-        upload_granularity = int(
-            step_one_resp_headers.get("X-Goog-Upload-Chunk-Granularity")
-        )
-        # LOG.info(upload_granularity)
-        # https://t.me/c/1279877202/74
-        number_of_req_s = int(file_size / upload_granularity)
-        # LOG.info(number_of_req_s)
-        loop = asyncio.get_event_loop()
-        async with aiofiles.open(path_, mode="rb") as f_d:
-            for i in range(number_of_req_s):
-                current_chunk = await f_d.read(upload_granularity)
-                offset = i * upload_granularity
-                part_size = len(current_chunk)
-                headers = {
-                    "Content-Length": str(part_size),
-                    "X-Goog-Upload-Command": "upload",
-                    "X-Goog-Upload-Offset": str(offset),
-                    "Authorization": "Bearer " + creds.access_token,
-                }
-                # LOG.info(i)
-                # LOG.info(headers)
-                response = await session.post(
-                    real_upload_url, headers=headers, data=current_chunk
-                )
-                loop.create_task(
-                    progress(
-                        offset + part_size, file_size, message, "uploading(gphoto)🧐?"
-                    )
-                )
-                # LOG.info(response.headers)
-                # https://github.com/SpEcHiDe/UniBorg/commit/8267811b1248c00cd1e34041e2ae8c82b207970f
-                # await f_d.seek(upload_granularity)
-            # await f_d.seek(upload_granularity)
+    session = get_session()
+    headers = {
+        "Content-Length": "0",
+        "X-Goog-Upload-Command": "start",
+        "X-Goog-Upload-Content-Type": mime_type,
+        "X-Goog-Upload-File-Name": file_name,
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Raw-Size": str(file_size),
+        "Authorization": "Bearer " + creds.access_token,
+    }
+    # Step 1: Initiating an upload session
+    step_one_response = await session.post(
+        f"{PHOTOS_BASE_URI}/v1/uploads", headers=headers, timeout=UPLOAD_TIMEOUT
+    )
+    if step_one_response.status != 200:
+        await message.edit_text((await step_one_response.text()))
+        return
+    step_one_resp_headers = step_one_response.headers
+    step_one_response.release()
+    # LOG.info(step_one_resp_headers)
+    # Step 2: Saving the session URL
+    real_upload_url = step_one_resp_headers.get("X-Goog-Upload-URL")
+    # LOG.info(real_upload_url)
+    upload_granularity = int(
+        step_one_resp_headers.get("X-Goog-Upload-Chunk-Granularity")
+    )
+    # LOG.info(upload_granularity)
+    # https://t.me/c/1279877202/74
+    number_of_req_s = int(file_size / upload_granularity)
+    # LOG.info(number_of_req_s)
+    loop = asyncio.get_event_loop()
+    async with aiofiles.open(path_, mode="rb") as f_d:
+        for i in range(number_of_req_s):
             current_chunk = await f_d.read(upload_granularity)
-            # https://t.me/c/1279877202/74
-            # LOG.info(number_of_req_s)
+            offset = i * upload_granularity
+            part_size = len(current_chunk)
             headers = {
-                "Content-Length": str(len(current_chunk)),
-                "X-Goog-Upload-Command": "upload, finalize",
-                "X-Goog-Upload-Offset": str(number_of_req_s * upload_granularity),
+                "Content-Length": str(part_size),
+                "X-Goog-Upload-Command": "upload",
+                "X-Goog-Upload-Offset": str(offset),
                 "Authorization": "Bearer " + creds.access_token,
             }
+            # LOG.info(i)
             # LOG.info(headers)
             response = await session.post(
-                real_upload_url, headers=headers, data=current_chunk
+                real_upload_url,
+                headers=headers,
+                data=current_chunk,
+                timeout=UPLOAD_TIMEOUT,
+            )
+            response.release()
+            loop.create_task(
+                progress(
+                    offset + part_size, file_size, message, "uploading(gphoto)🧐?"
+                )
             )
             # LOG.info(response.headers)
-        final_response_text = await response.text()
-        # LOG.info(final_response_text)
+            # https://github.com/SpEcHiDe/UniBorg/commit/8267811b1248c00cd1e34041e2ae8c82b207970f
+            # await f_d.seek(upload_granularity)
+        # await f_d.seek(upload_granularity)
+        current_chunk = await f_d.read(upload_granularity)
+        # https://t.me/c/1279877202/74
+        # LOG.info(number_of_req_s)
+        headers = {
+            "Content-Length": str(len(current_chunk)),
+            "X-Goog-Upload-Command": "upload, finalize",
+            "X-Goog-Upload-Offset": str(number_of_req_s * upload_granularity),
+            "Authorization": "Bearer " + creds.access_token,
+        }
+        # LOG.info(headers)
+        response = await session.post(
+            real_upload_url,
+            headers=headers,
+            data=current_chunk,
+            timeout=UPLOAD_TIMEOUT,
+        )
+        # LOG.info(response.headers)
+    final_response_text = await response.text()
+    # LOG.info(final_response_text)
     await message.edit_text("uploaded to Google Photos, getting FILE URI 🤔🤔")
     response_create_album = (
         service.mediaItems()
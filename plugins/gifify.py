@@ -2,19 +2,45 @@
 
 # By @Krishna_Singhal
 
-import os
+# Frames are rendered in chunks by the process pool workers, in parallel,
+# and piped in order into ffmpeg, which writes a palette optimized gif or,
+# with -mp4 / -webm, a video that encodes and uploads much faster.
 
-import lottie
-from paimon import Config, Message, pool, paimon
+from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import ffpipe, frames, media_cache
+from resources.output_cache import output_key, remember, send_cached
+from resources.process_pool import PROCESS_WORKERS, run_in_process
+from resources.workspace import Workspace
+
+# rendered chunks in flight at once, bounds memory for long stickers
+TGS_QUEUE = max(PROCESS_WORKERS, 1) * 2
+# stickers are transparent, gifs and videos get a white background
+BACKGROUND = (255, 255, 255)
+_GIF_FILTER = (
+    "[0:v]split[pal][gif];[pal]palettegen=stats_mode=diff[p];"
+    "[gif][p]paletteuse=dither=bayer:bayer_scale=3:diff_mode=rectangle")
+# output mode -> (file name, ffmpeg args)
+_MODES = {
+    "gif": ("animation.gif", ("-filter_complex", _GIF_FILTER)),
+    "mp4": ("animation.mp4", ffpipe.H264),
+    "webm": ("animation.webm", ("-c:v", "libvpx-vp9", "-deadline", "realtime",
+                                "-b:v", "0", "-crf", "35", "-pix_fmt", "yuv420p")),
+}
 
 
 @paimon.on_cmd(
     "gif",
     about={
         "header": "Convert Telegram Animated Sticker to GiF",
-        "usage": "{tr}gif [quality (optional)] [reply to sticker]\n"
+        "flags": {
+            "-mp4": "convert to a mp4 gif, way faster than a real gif",
+            "-webm": "convert to a webm video",
+        },
+        "usage": "{tr}gif [flags] [quality (optional)] [reply to sticker]\n"
         "Max quality : 720p",
-        "examples": ["{tr}gif [reply to sticker]", "{tr}gif 512 [reply to Sticker]"],
+        "examples": ["{tr}gif [reply to sticker]", "{tr}gif 512 [reply to Sticker]",
+                     "{tr}gif -mp4 720 [reply to Sticker]"],
     },
 )
 async def gifify(msg: Message):
@@ -23,37 +49,63 @@ async def gifify(msg: Message):
     if not (replied and replied.sticker and replied.sticker.file_name.endswith(".tgs")):
         await msg.err("Reply to Animated Sticker Only to Convert GiF", del_in=5)
         return
-    if msg.input_str:
-        if not msg.input_str.isdigit():
+    if msg.filtered_input_str:
+        if not msg.filtered_input_str.isdigit():
             await msg.err("Invalid given quality, Check help", del_in=5)
             return
-        input_ = int(msg.input_str)
+        input_ = int(msg.filtered_input_str)
         if not 0 < input_ < 721:
             await msg.err("Invalid quality range, Check help", del_in=5)
             return
         quality = input_
     else:
         quality = 512
-    if not os.path.isdir(Config.DOWN_PATH):
-        os.makedirs(Config.DOWN_PATH)
-    await msg.try_to_edit(
-        "```Converting this Sticker to GiF...\n" "This may takes upto few mins...```"
-    )
-    dls = await msg.client.download_media(replied, file_name=Config.DOWN_PATH)
-    converted_gif = await _tgs_to_gif(dls, quality)
-    await msg.client.send_animation(
-        msg.chat.id, converted_gif, unsave=True, reply_to_message_id=replied.message_id
-    )
+    mode = "webm" if "-webm" in msg.flags else "mp4" if "-mp4" in msg.flags else "gif"
+    key = output_key(msg.client, "gif", mode, quality, replied.sticker.file_unique_id)
+    if await send_cached(msg.client, msg.chat.id, key, replied.message_id):
+        await msg.delete()
+        return
+    await msg.try_to_edit(f"```Converting this Sticker to {mode.upper()}...```")
+    with Workspace("gif") as work:
+        name, args = _MODES[mode]
+        async with media_cache.fetch(replied) as dls:
+            try:
+                converted = await tgs_convert(msg, dls, work.file(name), quality, args)
+            except ProcessCanceled as p_c:
+                await msg.err(str(p_c), del_in=5)
+                return
+        if not converted:
+            await msg.err("```Couldn't convert this Sticker...```", del_in=5)
+            return
+        if mode == "webm":
+            sent = await msg.client.send_document(
+                msg.chat.id, converted, reply_to_message_id=replied.message_id
+            )
+        else:
+            sent = await msg.client.send_animation(
+                msg.chat.id, converted, unsave=True, reply_to_message_id=replied.message_id
+            )
     await msg.delete()
-    os.remove(converted_gif)
-
-
-@pool.run_in_thread
-def _tgs_to_gif(sticker_path: str, quality: int = 256) -> str:
-    dest = os.path.join(Config.DOWN_PATH, "animation.gif")
-    with open(dest, "wb") as t_g:
-        lottie.exporters.gif.export_gif(
-            lottie.parsers.tgs.parse_tgs(sticker_path), t_g, quality, 1
-        )
-    os.remove(sticker_path)
-    return dest
+    await remember(key, sent)
+
+
+def render_chunk(sticker, start, stop, size):
+    """ rgb24 frames [start, stop) of a sticker, in one piece for the pipe """
+    return b"".join(frames.render_frames(sticker, start, stop, size, BACKGROUND))
+
+
+async def tgs_convert(msg, sticker, output, quality, args):
+    """ renders ``sticker`` ``quality`` px wide with every worker and encodes it """
+    width, height, rate, count = await run_in_process(
+        frames.tgs_info, sticker, message=msg)
+    size = ffpipe.even(quality), ffpipe.even(round(quality * height / width))
+
+    async def _jobs():
+        for start in range(0, count, frames.FRAME_CHUNK):
+            yield run_in_process(
+                render_chunk, sticker, start, start + frames.FRAME_CHUNK, size,
+                message=msg)
+
+    done = await ffpipe.encode(
+        ffpipe.ordered(_jobs(), TGS_QUEUE), size, rate, output, *args)
+    return output if done else None
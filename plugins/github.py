@@ -3,9 +3,9 @@
 Syntax: .github USERNAME
 """
 
-import requests
-
 from paimon import paimon, Message
+from resources import http_client
+from resources.cache import cached
 
 
 @paimon.on_cmd("github", about={
@@ -22,18 +22,17 @@ async def fetch_github_info(message: Message):
         await message.err("invalid input !")
         return
     url = "https://api.github.com/users/{}".format(username)
-    res = requests.get(url)
-    if res.status_code == 200:
+    data = await _get_json(url)
+    if data:
         await message.edit("`fetching github info ...`")
-        data = res.json()
         photo = data["avatar_url"]
         if data['bio']:
             data['bio'] = data['bio'].strip()
         repos = []
-        sec_res = requests.get(data["repos_url"])
-        if sec_res.status_code == 200:
+        repos_data = await _get_json(data["repos_url"])
+        if repos_data:
             limit = int(message.flags.get('-l', 5))
-            for repo in sec_res.json():
+            for repo in repos_data:
                 repos.append(f"[{repo['name']}]({repo['html_url']})")
                 limit -= 1
                 if limit == 0:
@@ -60,3 +59,9 @@ async def fetch_github_info(message: Message):
         await message.delete()
     else:
         await message.edit("No user found with `{}` username!".format(username))
+
+
+@cached("github", ttl=1800, cache_if=lambda data: data is not None)
+async def _get_json(url: str):
+    res = await http_client.get(url)
+    return res.json() if res.status == 200 else None
@@ -1,21 +1,38 @@
 """ Glitch Media """
 import os
+import random
 
-from glitch_this import ImageGlitcher
+import numpy as np
 from PIL import Image
-from paimon import Config, Message, paimon
-from paimon.utils import runcmd, take_screen_shot
+from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import ffpipe, frames, media_cache
+from resources.memfile import to_file
+from resources.process_pool import PROCESS_WORKERS, run_in_process
+from resources.workspace import Workspace
 
-Glitched = Config.DOWN_PATH + "glitch.gif"
+# a still image is glitched into an animation of this many frames
+STILL_FRAMES = 23
+STILL_FPS = 5
+GLITCH_QUEUE = max(PROCESS_WORKERS, 1) * 2
+# palettegen has to see the whole clip, so it is buffered for the gif
+_GIF_FILTER = (
+    "[0:v]split=3[pal][gif][mp4];[pal]palettegen=stats_mode=diff[p];"
+    "[gif][p]paletteuse=dither=bayer:bayer_scale=3:diff_mode=rectangle[out]")
 
 
 @paimon.on_cmd(
     "glitch",
     about={
         "header": "Reply to any media to glitch",
-        "flags": {"-s": "Upload glitched IMG as a Sticker"},
-        "usage": "{tr}glitch [glitch count] [reply to any media]\n"
+        "flags": {
+            "-s": "Upload glitched IMG as a Sticker",
+            "-l": "add scan lines",
+            "-seed": "seed of the glitch, same seed gives the same glitch",
+        },
+        "usage": "{tr}glitch [flags] [glitch count] [reply to any media]\n"
         "glitch count = 0 to 8(default is 2)",
+        "examples": "{tr}glitch -l -seed=42 4 [reply to any media]",
     },
 )
 async def glitch_(message: Message):
@@ -39,66 +56,132 @@ async def glitch_(message: Message):
         args = input_
     else:
         args = 2
-    if not os.path.isdir(Config.DOWN_PATH):
-        os.makedirs(Config.DOWN_PATH)
+    seed = message.flags.get("-seed", "")
+    if seed and not seed.isdigit():
+        await message.err("```Seed must be a number...```", del_in=5)
+        return
+    seed = int(seed) if seed else random.randrange(2 ** 32)
+    scan_lines = "-l" in message.flags
     await message.edit("```Glitching Media...```")
-    dls = await message.client.download_media(
-        message=replied, file_name=Config.DOWN_PATH
-    )
-    dls_loc = os.path.join(Config.DOWN_PATH, os.path.basename(dls))
-    glitch_file = None
-    if replied.sticker and replied.sticker.file_name.endswith(".tgs"):
-        file_1 = os.path.join(Config.DOWN_PATH, "glitch.png")
-        cmd = f"lottie_convert.py --frame 0 -if lottie -of png {dls_loc} {file_1}"
-        stdout, stderr = (await runcmd(cmd))[:2]
-        if not os.path.lexists(file_1):
-            await message.err("```Sticker not found...```")
-            raise Exception(stdout + stderr)
-        glitch_file = file_1
-    elif replied.sticker and replied.sticker.file_name.endswith(".webp"):
-        file_2 = os.path.join(Config.DOWN_PATH, "glitch.png")
-        os.rename(dls_loc, file_2)
-        if not os.path.lexists(file_2):
-            await message.err("```Sticker not found...```")
-            return
-        glitch_file = file_2
-    elif replied.animation or replied.video:
-        file_3 = os.path.join(Config.DOWN_PATH, "glitch.png")
-        await take_screen_shot(dls_loc, 0, file_3)
-        if not os.path.lexists(file_3):
-            await message.err("```Sticker not found...```")
+    with Workspace("glitch") as work:
+        await _glitch(message, replied, args, seed, scan_lines, work)
+
+
+async def _glitch(message, replied, args, seed, scan_lines, work):
+    if "-s" not in message.flags and (replied.animation or replied.video):
+        async with media_cache.fetch(replied) as dls_loc:
+            try:
+                glitched = await glitch_clip(
+                    message, dls_loc, args, seed, scan_lines, work, animated=True,
+                    with_gif=bool(replied.animation))
+            except ProcessCanceled as p_c:
+                await message.err(str(p_c), del_in=5)
+                return
+        if not glitched:
+            await message.err("```Couldn't glitch this media...```", del_in=5)
             return
-        glitch_file = file_3
-    if glitch_file is None:
-        glitch_file = dls_loc
-    glitcher = ImageGlitcher()
-    img = Image.open(glitch_file)
+        await message.client.send_animation(
+            message.chat.id, glitched, reply_to_message_id=replied.message_id
+        )
+        await message.delete()
+        return
     message_id = replied.message_id
+    # stickers and the first frame of clips are glitched as a still
+    async with media_cache.source(message) as glitch_file:
+        if not glitch_file:
+            return
+        try:
+            if "-s" in message.flags:
+                glitched = await run_in_process(
+                    glitch_sticker, glitch_file, args, seed, scan_lines, message=message)
+            else:
+                glitched = await glitch_clip(
+                    message, glitch_file, args, seed, scan_lines, work, animated=False)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            return
+    if not glitched:
+        await message.err("```Couldn't glitch this media...```", del_in=5)
+        return
     if "-s" in message.flags:
-        glitched = Config.DOWN_PATH + "glitched.webp"
-        glitch_img = glitcher.glitch_image(img, args, color_offset=True)
-        glitch_img.save(glitched)
         await message.client.send_sticker(
             message.chat.id, glitched, reply_to_message_id=message_id
         )
-        os.remove(glitched)
     else:
-        glitch_img = glitcher.glitch_image(img, args, color_offset=True, gif=True)
-        DURATION = 200
-        LOOP = 0
-        glitch_img[0].save(
-            Glitched,
-            format="GIF",
-            append_images=glitch_img[1:],
-            save_all=True,
-            duration=DURATION,
-            loop=LOOP,
-        )
         await message.client.send_animation(
-            message.chat.id, Glitched, reply_to_message_id=message_id
+            message.chat.id, glitched, reply_to_message_id=message_id
         )
-        os.remove(Glitched)
     await message.delete()
-    for files in (dls_loc, glitch_file):
-        if files and os.path.exists(files):
-            os.remove(files)
+
+
+def glitch_frame(pixels, amount, seed, index=0, scan_lines=False):
+    """ glitch an rgb array, the same (seed, index) gives the same glitch """
+    rng = np.random.default_rng((seed, index))
+    height, width = pixels.shape[:2]
+    max_shift = max(width * amount // 40, 1)
+    # shift random blocks of rows sideways, in a single gather
+    shifts = np.zeros(height, dtype=np.intp)
+    for _ in range(amount * 2):
+        top = rng.integers(height)
+        rows = rng.integers(1, max(height // 10, 2))
+        shifts[top:top + rows] = rng.integers(-max_shift, max_shift + 1)
+    cols = (np.arange(width) - shifts[:, None]) % width
+    out = pixels[np.arange(height)[:, None], cols]
+    # pull two of the color channels apart
+    for channel in rng.choice(3, size=2, replace=False):
+        offset = (rng.integers(-max_shift // 4, max_shift // 4 + 1),
+                  rng.integers(-max_shift, max_shift + 1))
+        out[..., channel] = np.roll(out[..., channel], offset, axis=(0, 1))
+    if scan_lines:
+        out[::2] //= 2
+    return out
+
+
+def glitch_raw(raw, width, height, amount, seed, index, scan_lines):
+    """ glitch one rgb24 frame of a clip """
+    pixels = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+    return glitch_frame(pixels, amount, seed, index, scan_lines).tobytes()
+
+
+def glitch_sticker(glitch_file, amount, seed, scan_lines):
+    with frames.first_frame(glitch_file) as img:
+        pixels = np.asarray(img.convert("RGB"))
+    glitched = Image.fromarray(glitch_frame(pixels, amount, seed, 0, scan_lines))
+    return to_file(glitched, "glitched.webp")
+
+
+async def glitch_clip(message, src, amount, seed, scan_lines, work, animated,
+                      with_gif=True):
+    """ glitch every frame of a clip, or a still into STILL_FRAMES frames
+
+    frames are glitched in the process pool and piped into one ffmpeg, that
+    writes both a palette optimized gif and a mp4, the smaller one is kept """
+    info = await frames.probe(src)
+    if not info:
+        return None
+    width, height, rate = info
+    size = ffpipe.even(width), ffpipe.even(height)
+    if not animated:
+        rate = str(STILL_FPS)
+    gif_file, mp4_file = work.file("glitched.gif"), work.file("glitched.mp4")
+
+    async def _jobs():
+        index = 0
+        async for raw in frames.decode(src, size, None if animated else 1, message):
+            for _ in range(1 if animated else STILL_FRAMES):
+                yield run_in_process(
+                    glitch_raw, raw, *size, amount, seed, index, scan_lines,
+                    message=message)
+                index += 1
+
+    if with_gif:
+        args = ("-filter_complex", _GIF_FILTER, "-map", "[out]", gif_file,
+                "-map", "[mp4]", *ffpipe.H264)
+    else:
+        args = ffpipe.H264
+    done = await ffpipe.encode(
+        ffpipe.ordered(_jobs(), GLITCH_QUEUE), size, rate, mp4_file, *args)
+    outputs = [path for path in (gif_file, mp4_file) if os.path.exists(path)]
+    if not done or not outputs:
+        return None
+    return min(outputs, key=os.path.getsize)
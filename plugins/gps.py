@@ -1,8 +1,11 @@
 """GPS"""
 
-from geopy.geocoders import Nominatim
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from paimon import Message, paimon
+from resources import http_client
+
+# Nominatim allows 1 request / sec, paced by resources.ratelimit
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 
 
 @paimon.on_cmd(
@@ -25,15 +28,20 @@ async def gps_locate_(message: Message):
         if len(loc_x) == 2:
             titlex = loc_x[0]
             loc_ = loc_x[1]
-    geolocator = Nominatim(user_agent="paimon-X")
-    geoloc = geolocator.geocode(loc_)
+    geoloc = (
+        await http_client.get(
+            NOMINATIM_URL,
+            params={"q": loc_, "format": "json", "limit": 1},
+            headers={"User-Agent": "paimon-X"},
+        )
+    ).json()
     if not geoloc:
         return await message.err("**404 Location Not Found**", del_in=5)
-    address = geoloc.address
+    address = geoloc[0]["display_name"]
     place = address.split(",")
     name = titlex or place[0]
-    lon = geoloc.longitude
-    lat = geoloc.latitude
+    lon = float(geoloc[0]["lon"])
+    lat = float(geoloc[0]["lat"])
     await message.delete()
     reply = message.reply_to_message
     reply_id = reply.message_id if reply else None
@@ -1,15 +1,18 @@
 # kanged from github.com/theuserge/userge
 # Edited by aliciadark
 
+import asyncio
 import json
 import os
 from operator import truediv
 
-import requests
 import wget
 from PIL import Image
 
 from paimon import Config, Message, paimon, pool
+from resources import http_client
+from resources.cache import cached
+from resources.ratelimit import backoff
 
 THUMB_PATH = Config.DOWN_PATH + "imdb_thumb.jpg"
 API_ONE_URL = os.environ.get("IMDB_API_ONE_URL")
@@ -32,14 +35,14 @@ async def imdb(message: Message):
     try:
         movie_name = message.input_str
         await message.edit(f"__searching IMDB for__ : `{movie_name}`")
-        search_results = await _get(API_ONE_URL.format(paimon=movie_name))
-        srch_results = json.loads(search_results.text)
+        srch_results = await _get_json(API_ONE_URL.format(paimon=movie_name))
         first_movie = srch_results.get("d")[0]
         mov_title = first_movie.get("l")
         mov_imdb_id = first_movie.get("id")
         mov_link = f"https://www.imdb.com/title/{mov_imdb_id}"
-        page2 = await _get(API_TWO_URL.format(imdbttid=mov_imdb_id))
-        second_page_response = json.loads(page2.text)
+        second_page_response = await _get_json(
+            API_TWO_URL.format(imdbttid=mov_imdb_id)
+        )
         image_link = first_movie.get("i").get("imageUrl")
         mov_details = get_movie_details(second_page_response)
         director, writer, stars = get_credits_text(second_page_response)
@@ -160,13 +163,18 @@ def get_credits_text(soup):
     return director, writers, actors
 
 
-@pool.run_in_thread
-def _get(url: str, attempts: int = 0) -> requests.Response:
+async def _get(url: str, attempts: int = 0) -> http_client.HttpResponse:
     while True:
-        abc = requests.get(url)
+        abc = await http_client.get(url)
+        if abc.status == 200:
+            break
         if attempts > 5:
             raise IndexError
-        if abc.status_code == 200:
-            break
+        await asyncio.sleep(backoff(attempts))
         attempts += 1
     return abc
+
+
+@cached("imdb", ttl=6 * 3600, persist=True)
+async def _get_json(url: str) -> dict:
+    return json.loads((await _get(url)).text)
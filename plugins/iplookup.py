@@ -2,9 +2,8 @@
 # A IP Address Lookup Plugin!
 # Modded from @AHToolsBot by @Discovery_Updates
 
-import aiohttp
-
 from paimon import paimon, Message
+from resources import http_client
 
 
 @paimon.on_cmd(
@@ -20,9 +19,7 @@ async def _ip_look_up(message: Message):
     url = (
         f"https://extreme-ip-lookup.com/json/{message.input_str}?key=Qn97RtiI2gwjStzJJjuG"
     )
-    async with aiohttp.ClientSession() as requests:
-        data = await requests.get(url)
-        values = await data.json()
+    values = (await http_client.get(url)).json()
     status = values['status']
     if status != "success":
         await message.edit("`Provided IP Address invalid!`")
@@ -10,11 +10,12 @@ import string
 import random
 from urllib.parse import unquote_plus
 
-import requests
+from aiohttp import FormData
 from pySmartDL import SmartDL
 
 from paimon import paimon, Config, Message
 from paimon.utils import progress, humanbytes
+from resources import http_client
 
 
 @paimon.on_cmd("labstack", about={
@@ -116,18 +117,18 @@ async def labstack(message: Message):
         'Mozilla/5.0 (X11; Linux x86_64)'
         'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.97 Safari/537.36'
     }
-    kwargs = dict(headers=headers, verify=False)
+    kwargs = dict(headers=headers, ssl=False)
 
-    r = requests.post(
-        "https://up.labstack.com/api/v1/links", json=data, **kwargs).json()
+    r = (await http_client.post(
+        "https://up.labstack.com/api/v1/links", json=data, **kwargs)).json()
 
-    files = {
-        'files': (filename, open(dl_loc, 'rb')),
-    }
     send_url = "https://up.labstack.com/api/v1/links/{}/send".format(
         r['code'])
-    response = requests.post(send_url, files=files, **kwargs)
-    if (response.status_code) == 200:
+    with open(dl_loc, 'rb') as file_:
+        files = FormData()
+        files.add_field('files', file_, filename=filename)
+        response = await http_client.post(send_url, data=files, **kwargs)
+    if (response.status) == 200:
         link = (
             "https://up.labstack.com/api/v1/links/{}/receive".format(r['code']))
         await message.edit(f"**Filename**: `{filename}`\n**Size**: "
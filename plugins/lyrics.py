@@ -1,10 +1,10 @@
 import os
 import re
 
-import requests
 from bs4 import BeautifulSoup
 from googlesearch import search
-from paimon import Message, paimon
+from paimon import Message, paimon, pool
+from resources import http_client
 
 
 @paimon.on_cmd(
@@ -23,8 +23,8 @@ async def glyrics(message: Message):
         return
     await message.edit(f"__Searching Lyrics For {song}__")
     to_search = song + "genius lyrics"
-    gen_surl = list(search(to_search, num=1, stop=1))[0]
-    gen_page = requests.get(gen_surl)
+    gen_surl = (await _search(to_search))[0]
+    gen_page = await http_client.get(gen_surl)
     scp = BeautifulSoup(gen_page.text, "html.parser")
     lyrics = scp.find("div", class_="lyrics")
     if not lyrics:
@@ -56,3 +56,8 @@ async def glyrics(message: Message):
         await message.edit(lyr_format)
     else:
         await message.edit(f"No Lyrics Found for **{song}**")
+
+
+@pool.run_in_thread
+def _search(query: str) -> list:
+    return list(search(query, num=1, stop=1))
@@ -7,13 +7,22 @@
 #           2. https://github.com/midnightmadwalk [TG: @MidnightMadwalk] for 🌀 Spin
 
 
+import math
 import os
-from shutil import rmtree
+from functools import lru_cache
 
+import numpy as np
 from PIL import Image, ImageOps
-from paimon import Config, Message, paimon
+from paimon import Message, paimon
 from paimon.plugins.utils.circle import crop_vid
-from paimon.utils import media_to_image, runcmd, safe_filename
+from paimon.utils.exceptions import ProcessCanceled
+from resources import ffpipe, frames, media_cache
+from resources.memfile import to_file
+from resources.process_pool import PROCESS_WORKERS, run_in_process
+from resources.workspace import Workspace
+
+# rotated frames rendered per pool job
+SPIN_CHUNK = 12
 
 
 @paimon.on_cmd(
@@ -37,22 +46,25 @@ async def transform(message: Message):
     transform_choice = message.matches[0].group(1).lower()
     choice_string = transform_choice.capitalize()
     await message.edit(f"<code>{choice_string}ing Media!...</code>")
-    dls_loc = await media_to_image(message)
-    if not dls_loc:
-        return
-    webp_file = await transform_media(dls_loc, transform_choice)
+    async with media_cache.source(message) as dls_loc:
+        if not dls_loc:
+            return
+        try:
+            webp_file = await run_in_process(
+                transform_media, dls_loc, transform_choice, message=message)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            return
     await message.client.send_sticker(
         chat_id=message.chat.id,
         sticker=webp_file,
         reply_to_message_id=replied.message_id,
     )
     await message.delete()
-    os.remove(webp_file)
 
 
-async def transform_media(image_path, transform_choice):
-    im = Image.open(image_path)
-    os.remove(image_path)
+def transform_media(image_path, transform_choice):
+    im = frames.first_frame(image_path)
     if im.mode != "RGB":
         im = im.convert("RGB")
     if transform_choice == "flip":
@@ -61,10 +73,7 @@ async def transform_media(image_path, transform_choice):
         out = ImageOps.invert(im)
     else:
         out = im.transpose(Image.FLIP_LEFT_RIGHT)
-    image_name = "invert.webp"
-    webp_file = os.path.join(Config.DOWN_PATH, image_name)
-    out.save(webp_file, "WebP")
-    return webp_file
+    return to_file(out, "invert.webp")
 
 
 @paimon.on_cmd(
@@ -96,17 +105,20 @@ async def rotate_(message: Message):
     else:
         args = 90
     await message.edit(f"<code>Rotating Media by {args}°...</code>")
-    dls_loc = await media_to_image(message)
-    if not dls_loc:
-        return
-    webp_file = await rotate_media(dls_loc, args)
+    async with media_cache.source(message) as dls_loc:
+        if not dls_loc:
+            return
+        try:
+            webp_file = await run_in_process(rotate_media, dls_loc, args, message=message)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            return
     await message.client.send_sticker(
         chat_id=message.chat.id,
         sticker=webp_file,
         reply_to_message_id=replied.message_id,
     )
     await message.delete()
-    os.remove(webp_file)
 
 
 @paimon.on_cmd(
@@ -146,63 +158,97 @@ async def spinn(message: Message):
             return await message.err("Not valid value for flag '-s'", del_in=5)
     else:
         step = 1
-    # Haha paimon-X custom function
-    pic_loc = safe_filename(await media_to_image(message))
-    if not pic_loc:
-        return await message.err("Reply to a valid media first", del_in=5)
+    async with media_cache.source(message) as pic_loc:
+        if not pic_loc:
+            return await message.err("Reply to a valid media first", del_in=5)
+        await _spin(message, pic_loc, step)
+
+
+async def _spin(message: Message, pic_loc: str, step: int):
+    reply = message.reply_to_message
     await message.edit("🌀 `Tighten your seatbelts, sh*t is about to get wild ...`")
     # direction of rotation
     spin_dir = -1 if "-c" in message.flags else 1
-    path = "paimon/xcache/rotate-disc/"
-    if os.path.exists(path):
-        rmtree(path, ignore_errors=True)
-    os.mkdir(path)
-    # Converting RGBA to RGB
-    im = Image.open(pic_loc)
-    if im.mode != "RGB":
-        im = im.convert("RGB")
-    # Rotating pic by given angle and saving
-    for k, nums in enumerate(range(1, 360, step), start=0):
-        y = im.rotate(nums * spin_dir)
-        y.save(os.path.join(path, "spinx%s.jpg" % k))
+    info = await frames.probe(pic_loc)
+    if not info:
+        return await message.err("Reply to a valid media first", del_in=5)
+    size = ffpipe.even(info[0]), ffpipe.even(info[1])
+    angles = [nums * spin_dir for nums in range(1, 360, step)]
+
+    async def _jobs():
+        for i in range(0, len(angles), SPIN_CHUNK):
+            yield run_in_process(
+                spin_frames, pic_loc, size, angles[i:i + SPIN_CHUNK], message=message)
 
-    output_vid = os.path.join(path, "out.mp4")
     # ;__; Maths lol, y = mx + c
     frate = int(((90 / 59) * step) + (1680 / 59))
-    # https://stackoverflow.com/questions/20847674/ffmpeg-libx264-height-not-divisible-by-2
-    await runcmd(
-        f'ffmpeg -framerate {frate} -i {path}spinx%d.jpg -c:v libx264 -preset ultrafast -vf "crop=trunc(iw/2)*2:trunc(ih/2)*2" -pix_fmt yuv420p {output_vid}'
-    )
-    if os.path.exists(output_vid):
-        reply_id = reply.message_id if reply else None
-        if "-r" in message.flags:
-            round_vid = os.path.join(path, "out_round.mp4")
-            # aspect ratio = 1:1
-            await crop_vid(output_vid, round_vid)
-            await message.client.send_video_note(
-                message.chat.id, round_vid, reply_to_message_id=reply_id
-            )
-        else:
-            await message.client.send_animation(
-                message.chat.id,
-                output_vid,
-                unsave=(not message.client.is_bot),
-                reply_to_message_id=reply_id,
-            )
-        await message.delete()
-    # Clean up
-    os.remove(pic_loc)
-    rmtree(path, ignore_errors=True)
-
-
-async def rotate_media(image_path, args):
-    im = Image.open(image_path)
-    os.remove(image_path)
+    with Workspace("spin") as work:
+        output_vid = work.file("spin.mp4")
+        try:
+            done = await ffpipe.encode(
+                ffpipe.ordered(_jobs(), max(PROCESS_WORKERS, 1) * 2),
+                size, frate, output_vid, *ffpipe.H264)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            done = False
+        if done:
+            reply_id = reply.message_id if reply else None
+            if "-r" in message.flags:
+                round_vid = work.file("spin_round.mp4")
+                # aspect ratio = 1:1
+                await crop_vid(output_vid, round_vid)
+                await message.client.send_video_note(
+                    message.chat.id, round_vid, reply_to_message_id=reply_id
+                )
+            else:
+                await message.client.send_animation(
+                    message.chat.id,
+                    output_vid,
+                    unsave=(not message.client.is_bot),
+                    reply_to_message_id=reply_id,
+                )
+            await message.delete()
+
+
+def spin_frames(pic_loc, size, angles):
+    """ rotated rgb24 frames for a chunk of angles """
+    pixels = _spin_source(pic_loc, size, os.stat(pic_loc).st_mtime_ns)
+    grid = _rotation_grid(*size)
+    return b"".join(_rotate(pixels, grid, angle).tobytes() for angle in angles)
+
+
+@lru_cache(maxsize=4)
+def _spin_source(pic_loc, size, _mtime):
+    # every chunk a worker gets decodes the picture only once
+    with frames.first_frame(pic_loc) as im:
+        return np.asarray(im.convert("RGB").crop((0, 0) + size))
+
+
+@lru_cache(maxsize=4)
+def _rotation_grid(width, height):
+    """ pixel centers relative to the image center, shared by every angle """
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32) + 0.5
+    return xs - width / 2, ys - height / 2
+
+
+def _rotate(pixels, grid, angle):
+    """ counter clockwise rotation about the center, like Image.rotate """
+    d_x, d_y = grid
+    height, width = pixels.shape[:2]
+    rad = -math.radians(angle)
+    cos, sin = math.cos(rad), math.sin(rad)
+    s_x = np.floor(cos * d_x + sin * d_y + width / 2).astype(np.intp)
+    s_y = np.floor(-sin * d_x + cos * d_y + height / 2).astype(np.intp)
+    inside = (s_x >= 0) & (s_x < width) & (s_y >= 0) & (s_y < height)
+    out = np.zeros_like(pixels)
+    out[inside] = pixels[s_y[inside], s_x[inside]]
+    return out
+
+
+def rotate_media(image_path, args):
+    im = frames.first_frame(image_path)
     if im.mode != "RGB":
         im = im.convert("RGB")
     angle = args
     out = im.rotate(angle, expand=True)
-    image_name = "rotated.webp"
-    webp_file = os.path.join(Config.DOWN_PATH, image_name)
-    out.save(webp_file, "WebP")
-    return webp_file
+    return to_file(out, "rotated.webp")
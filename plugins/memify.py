@@ -1,9 +1,20 @@
-import os
 import textwrap
+from io import BytesIO
+from typing import Optional
 
-from PIL import Image, ImageDraw, ImageFont
-from paimon import Config, Message, paimon
-from paimon.utils import media_to_image
+from PIL import Image, ImageDraw
+from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import assets, ffpipe, frames, media_cache
+from resources.memfile import to_file
+from resources.output_cache import output_key, remember, send_cached
+from resources.process_pool import run_in_process
+from resources.textfit import fit_size, load_font, measure
+from resources.workspace import Workspace
+
+MEME_FONT = "resources/MutantAcademyStyle.ttf"
+# size used on 512px stickers
+assets.register(MEME_FONT, 56)
 
 
 @paimon.on_cmd(
@@ -26,124 +37,113 @@ async def memify(message: Message):
             sticker="CAADAQADhAAD3gkwRviGxMVn5813FgQ", chat_id=message.chat.id
         )
         return
+    key = output_key(message.client, "mmf", message.input_str,
+                     media_cache.unique_id(replied))
+    if await send_cached(message.client, message.chat.id, key, replied.message_id):
+        await message.delete()
+        return
 
+    if replied.animation or replied.video:
+        await message.edit("```Memifying...```")
+        async with media_cache.fetch(replied, message) as dls:
+            with Workspace("memify") as work:
+                await remember(key, await memify_clip(message, dls, work))
+        return
     # Here the Magic happens
-    dls_loc = await media_to_image(message)
-    # UWU
-    if dls_loc:
-        webp_file = await draw_meme_text(dls_loc, message.input_str)
-        await message.client.send_sticker(
-            chat_id=message.chat.id,
-            sticker=webp_file,
-            reply_to_message_id=replied.message_id,
-        )
-        await message.delete()
-        os.remove(webp_file)
+    async with media_cache.source(message) as dls_loc:
+        if not dls_loc:
+            return
+        # UWU
+        try:
+            webp_file = await run_in_process(
+                draw_meme_text, dls_loc, message.input_str, message=message)
+        except ProcessCanceled as p_c:
+            await message.err(str(p_c), del_in=5)
+            return
+    sent = await message.client.send_sticker(
+        chat_id=message.chat.id,
+        sticker=webp_file,
+        reply_to_message_id=replied.message_id,
+    )
+    await message.delete()
+    await remember(key, sent)
 
 
-async def draw_meme_text(image_path, text):
-    img = Image.open(image_path)
-    os.remove(image_path)
-    i_width, i_height = img.size
-    m_font = ImageFont.truetype(
-        "resources/MutantAcademyStyle.ttf", int((70 / 640) * i_width)
+async def memify_clip(message: Message, dls: str,
+                      work: Workspace) -> Optional[Message]:
+    """ the text layer is rendered once and laid over every frame by ffmpeg """
+    replied = message.reply_to_message
+    info = await ffpipe.probe(dls)
+    if not info:
+        await message.err("```Couldn't read this Media...```", del_in=5)
+        return None
+    size = ffpipe.even(info[0]), ffpipe.even(info[1])
+    try:
+        layer = await run_in_process(
+            meme_overlay_png, size, message.input_str, message=message)
+    except ProcessCanceled as p_c:
+        await message.err(str(p_c), del_in=5)
+        return None
+    meme_vid = work.file("memify.mp4")
+    if not await ffpipe.overlay(dls, layer, size, meme_vid):
+        await message.err("```Couldn't memify this Media...```", del_in=5)
+        return None
+    sent = await message.client.send_animation(
+        chat_id=message.chat.id,
+        animation=meme_vid,
+        reply_to_message_id=replied.message_id,
     )
-    if ";" in text:
-        upper_text, lower_text = text.split(";")
-    else:
-        upper_text = text
-        lower_text = ""
-    draw = ImageDraw.Draw(img)
-    current_h, pad = 10, 5
-    if upper_text:
-        for u_text in textwrap.wrap(upper_text, width=15):
-            u_width, u_height = draw.textsize(u_text, font=m_font)
+    await message.delete()
+    return sent
+
+
+def meme_overlay(size, text):
+    """ transparent layer with the meme text, each line drawn once with a stroke """
+    i_width, i_height = size
+    upper_text, _, lower_text = text.partition(";")
+    upper_lines = textwrap.wrap(upper_text, width=15)
+    lower_lines = textwrap.wrap(lower_text, width=15)
+    # long words shrink the font until both blocks fit their half
+    box = (i_width - int((20 / 640) * i_width), i_height // 2)
+    f_size = max(int((70 / 640) * i_width), 1)
+    for lines in (upper_lines, lower_lines):
+        if lines:
+            f_size = fit_size(MEME_FONT, "\n".join(lines), box, f_size, stroke_width=1)
+    m_font = load_font(MEME_FONT, f_size)
+    layer = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    pad = 5
+
+    def _draw_line(line, y):
+        draw.text(
+            xy=((i_width - measure(MEME_FONT, f_size, line, 1)[0]) / 2, y),
+            text=line,
+            font=m_font,
+            fill=(255, 255, 255),
+            stroke_width=1,
+            stroke_fill=(0, 0, 0),
+        )
 
-            draw.text(
-                xy=(((i_width - u_width) / 2) - 1, int((current_h / 640) * i_width)),
-                text=u_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
-            draw.text(
-                xy=(((i_width - u_width) / 2) + 1, int((current_h / 640) * i_width)),
-                text=u_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
-            draw.text(
-                xy=((i_width - u_width) / 2, int(((current_h / 640) * i_width)) - 1),
-                text=u_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
-            draw.text(
-                xy=(((i_width - u_width) / 2), int(((current_h / 640) * i_width)) + 1),
-                text=u_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
+    current_h = int((10 / 640) * i_width)
+    for u_text in upper_lines:
+        _draw_line(u_text, current_h)
+        current_h += measure(MEME_FONT, f_size, u_text, 1)[1] + pad
+    # lower lines are stacked upwards from the bottom edge
+    current_h = i_height - int((20 / 640) * i_width)
+    for l_text in reversed(lower_lines):
+        current_h -= measure(MEME_FONT, f_size, l_text, 1)[1]
+        _draw_line(l_text, current_h)
+        current_h -= pad
+    return layer
 
-            draw.text(
-                xy=((i_width - u_width) / 2, int((current_h / 640) * i_width)),
-                text=u_text,
-                font=m_font,
-                fill=(255, 255, 255),
-            )
-            current_h += u_height + pad
-    if lower_text:
-        for l_text in textwrap.wrap(lower_text, width=15):
-            u_width, u_height = draw.textsize(l_text, font=m_font)
 
-            draw.text(
-                xy=(
-                    ((i_width - u_width) / 2) - 1,
-                    i_height - u_height - int((20 / 640) * i_width),
-                ),
-                text=l_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
-            draw.text(
-                xy=(
-                    ((i_width - u_width) / 2) + 1,
-                    i_height - u_height - int((20 / 640) * i_width),
-                ),
-                text=l_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
-            draw.text(
-                xy=(
-                    (i_width - u_width) / 2,
-                    (i_height - u_height - int((20 / 640) * i_width)) - 1,
-                ),
-                text=l_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
-            draw.text(
-                xy=(
-                    (i_width - u_width) / 2,
-                    (i_height - u_height - int((20 / 640) * i_width)) + 1,
-                ),
-                text=l_text,
-                font=m_font,
-                fill=(0, 0, 0),
-            )
+def meme_overlay_png(size, text):
+    buf = BytesIO()
+    meme_overlay(size, text).save(buf, "PNG")
+    return buf.getvalue()
 
-            draw.text(
-                xy=(
-                    (i_width - u_width) / 2,
-                    i_height - u_height - int((20 / 640) * i_width),
-                ),
-                text=l_text,
-                font=m_font,
-                fill=(255, 255, 255),
-            )
-            current_h += u_height + pad
 
-    image_name = "memify.webp"
-    webp_file = os.path.join(Config.DOWN_PATH, image_name)
-    img.save(webp_file, "WebP")
-    return webp_file
+def draw_meme_text(image_path, text):
+    img = frames.first_frame(image_path).convert("RGBA")
+    img.alpha_composite(meme_overlay(img.size, text))
+    return to_file(img, "memify.webp")
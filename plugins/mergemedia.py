@@ -14,6 +14,7 @@ from hachoir.stream.input import InputStreamError, NullStreamError
 from paimon import Message, paimon
 from paimon.plugins.misc.upload import upload
 from paimon.utils import progress, runcmd, safe_filename
+from resources.workspace import Workspace
 
 
 @paimon.on_cmd(
@@ -51,40 +52,39 @@ async def mergesave_(message: Message):
 async def merge_(message: Message):
     """Merge Media."""
     name_ = message.input_str
-    # preparing text file.
-    await message.edit("`🙂🙃 Preparing text file ...`")
-    txt_file = codecs.open("merge.txt", "w+", "utf-8")
-    for media in os.listdir("paimon/xcache/merge"):
-        data_ = "file" + " " + "'" + "paimon/xcache/merge/" + media + "'" + "\n"
-        txt_file.write(data_)
-    txt_file.close()
-    # detecting extension.
-    await message.edit("`😎🥲 detecting extension ...`")
-    for ext in os.listdir("paimon/xcache/merge")[:1]:
-        rege_x = re.findall("[^.]*$", ext)[0]
-        await message.edit(f"detected extension is .{rege_x}")
-    # custom name.
-    if name_:
-        output_path = "paimon/xcache/merge/" + name_ + "." + rege_x
-    else:
-        output_path = "paimon/xcache/merge/output." + rege_x
-    # ffmpeg.
-    await message.edit("`🏃️🏃🏃 ffmpeg ...`")
-    logs_ = await runcmd(
-        f"""ffmpeg -f concat -safe 0 -i merge.txt -map 0 -c copy -scodec copy {output_path}"""
-    )
-    # upload.
-    try:
-        await upload(message, Path(output_path))
-    except (NullStreamError, InputStreamError):
-        await message.err("Something went south generating ffmpeg log file.")
-        await message.reply(logs_)
-    else:
-        await message.edit("`successfully merged ...`")
+    with Workspace("merge") as work:
+        # preparing text file.
+        await message.edit("`🙂🙃 Preparing text file ...`")
+        list_file = work.file("merge.txt")
+        txt_file = codecs.open(list_file, "w+", "utf-8")
+        for media in os.listdir("paimon/xcache/merge"):
+            media_path = os.path.abspath("paimon/xcache/merge/" + media)
+            data_ = "file" + " " + "'" + media_path + "'" + "\n"
+            txt_file.write(data_)
+        txt_file.close()
+        # detecting extension.
+        await message.edit("`😎🥲 detecting extension ...`")
+        for ext in os.listdir("paimon/xcache/merge")[:1]:
+            rege_x = re.findall("[^.]*$", ext)[0]
+            await message.edit(f"detected extension is .{rege_x}")
+        # custom name.
+        output_path = work.file((name_ or "output") + "." + rege_x)
+        # ffmpeg.
+        await message.edit("`🏃️🏃🏃 ffmpeg ...`")
+        logs_ = await runcmd(
+            f"""ffmpeg -f concat -safe 0 -i {list_file} -map 0 -c copy -scodec copy {output_path}"""
+        )
+        # upload.
+        try:
+            await upload(message, Path(output_path))
+        except (NullStreamError, InputStreamError):
+            await message.err("Something went south generating ffmpeg log file.")
+            await message.reply(logs_)
+        else:
+            await message.edit("`successfully merged ...`")
     # cleanup.
     await message.edit("`🤯😪 cleaning mess ...`", del_in=10)
     shutil.rmtree("paimon/xcache/merge")
-    os.remove("merge.txt")
 
 
 @paimon.on_cmd(
@@ -7,20 +7,21 @@
 
 import os
 
-from aiohttp import ClientSession
 # from Python_ARQ import ARQ
 from paimon import Config, Message, paimon
 from paimon.plugins.misc.download import url_download
+from resources.http_client import get_session
 
 ARQ_KEY = os.environ.get("ARQ_KEY", None)
 
-# ARQ API
-session = ClientSession()
-arq = ARQ("https://thearq.tech", ARQ_KEY, session) if ARQ_KEY else None
-
 LOGGER = paimon.getLogger(__name__)
 
 
+def _arq():
+    """ ARQ API on top of the shared http session """
+    return ARQ("https://thearq.tech", ARQ_KEY, get_session())
+
+
 @paimon.on_cmd(
     "saavn",
     about={
@@ -39,7 +40,7 @@ async def savn(message: Message):
     query = message.input_str
     await message.edit(f"Searching for {query} in JioSaavn...")
     try:
-        res = await arq.saavn(query)
+        res = await _arq().saavn(query)
     except Exception as e:
         return await message.err(str(e))
     if not res.ok:
@@ -85,7 +86,7 @@ async def deeza(message: Message):
     query = str(message.filtered_input_str)
     await message.edit(f"Searching for {query} in Deezer...")
     try:
-        res = await arq.deezer(query, 1, 9 if message.flags else 3)
+        res = await _arq().deezer(query, 1, 9 if message.flags else 3)
     except Exception as e:
         return await message.err(str(e))
     if not res.ok:
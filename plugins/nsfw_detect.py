@@ -3,14 +3,11 @@
 
 """Detects Nsfw content with the help of A.I."""
 
-import os
-
-import aiohttp
-
 # if you prefer requests
 # import requests
 from paimon import Config, Message, paimon
-from paimon.utils import media_to_image
+from resources import http_client, media_cache
+from resources.breaker import CircuitOpenError
 
 
 @paimon.on_cmd(
@@ -31,18 +28,24 @@ async def detect_(message: Message):
             "add VAR `DEEP_AI` get Api Key from https://deepai.org/", del_in=7
         )
         return
-    image = await media_to_image(message)
+    async with media_cache.still_image(message) as image:
+        if not image:
+            return
 
-    # Request method
-    # r = requests.post(
-    #     "https://api.deepai.org/api/nsfw-detector",
-    #     files={
-    #         "image": open(photo, "rb"),
-    #     },
-    #     headers={"api-key": Config.DEEP_AI},
-    # )
+        # Request method
+        # r = requests.post(
+        #     "https://api.deepai.org/api/nsfw-detector",
+        #     files={
+        #         "image": open(photo, "rb"),
+        #     },
+        #     headers={"api-key": Config.DEEP_AI},
+        # )
 
-    out = await post_photo(image)
+        try:
+            out = await post_photo(image)
+        except CircuitOpenError as c_e:
+            await message.err(str(c_e), del_in=6)
+            return
     if "status" in out:
         await message.err(out["status"], del_in=6)
         return
@@ -59,18 +62,16 @@ async def detect_(message: Message):
             confidence = int(float(parts["confidence"]) * 100)
             result += f"• {name}:\n   <code>{confidence} %</code>\n"
     await message.edit(result, disable_web_page_preview=True)
-    os.remove(image)
 
 
 # Aiohttp method
 async def post_photo(photo: str):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
+    with open(photo, "rb") as image:
+        response = await http_client.post(
             "https://api.deepai.org/api/nsfw-detector",
             data={
-                "image": open(photo, "rb"),
+                "image": image,
             },
             headers={"api-key": Config.DEEP_AI},
-        ) as response:
-            result = await response.json()
-    return result
+        )
+    return response.json()
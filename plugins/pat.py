@@ -2,8 +2,8 @@ from os import remove
 from random import choice
 from urllib import parse
 
-import requests
 from paimon import Message, paimon
+from resources import http_client
 
 BASE_URL = "https://headp.at/pats/{}"
 PAT_IMAGE = "pat.jpg"
@@ -18,11 +18,11 @@ async def pat_(message: Message):
         await message.edit("**Bruh** ~`Reply to a message or provide username`")
         return
 
-    resp = requests.get("http://headp.at/js/pats.json")
+    resp = await http_client.get("http://headp.at/js/pats.json")
     pats = resp.json()
     pat = BASE_URL.format(parse.quote(choice(pats)))
     with open(PAT_IMAGE, "wb") as f:
-        f.write(requests.get(pat).content)
+        f.write((await http_client.get(pat)).content)
     if username:
         await message.reply_photo(
             photo=PAT_IMAGE, caption=username, reply_to_message_id=message.message_id
@@ -5,10 +5,10 @@
 
 import os
 
-import requests
-from html_telegraph_poster.upload_images import upload_image
 from paimon import Config, Message, paimon
 from paimon.utils import deEmojify
+from resources import http_client, telegraph
+from resources.breaker import CircuitOpenError
 from validators.url import url
 
 
@@ -52,11 +52,14 @@ async def ph_comment(message: Message):
         pfp_photo = user.photo.small_file_id
         file_name = os.path.join(Config.DOWN_PATH, "profile_pic.jpg")
         picture = await message.client.download_media(pfp_photo, file_name=file_name)
-        loc_f = upload_image(picture)
+        loc_f = "https://telegra.ph" + await telegraph.upload_file(picture)
         os.remove(picture)
     else:
         loc_f = "https://telegra.ph/file/9844536dbba404c227181.jpg"
-    path = await phcomment(loc_f, comment, name)
+    try:
+        path = await phcomment(loc_f, comment, name)
+    except CircuitOpenError as c_e:
+        return await message.err(str(c_e))
     if path == "ERROR":
         return await message.edit("😔 Something Wrong see Help!", del_in=2)
     chat_id = message.chat.id
@@ -68,7 +71,7 @@ async def ph_comment(message: Message):
 
 async def phcomment(text1, text2, text3):
     site = "https://nekobot.xyz/api/imagegen?type=phcomment&image="
-    r = requests.get(f"{site}{text1}&text={text2}&username={text3}").json()
+    r = (await http_client.get(f"{site}{text1}&text={text2}&username={text3}")).json()
     urlx = r.get("message")
     ph_url = url(urlx)
     if not ph_url:
@@ -16,12 +16,15 @@ from pyrogram.errors import (
     VideoFileInvalid,
 )
 from pyrogram.types import InputMediaPhoto
-from paimon import Config, Message, paimon
+from paimon import Message, paimon
 from paimon.utils import progress
+from resources import media_cache
+from resources.workspace import Workspace
 
 CHANNEL = paimon.getCLogger(__name__)
-PHOTO = Config.DOWN_PATH + "profile_pic.jpg"
 USER_DATA = {}
+# set while our profile photo is a cloned one
+PHOTO_CLONED = False
 
 
 @paimon.on_cmd(
@@ -141,32 +144,29 @@ async def set_profile_picture(message: Message):
         )
     ):
 
-        await paimon.download_media(
-            message=replied,
-            file_name=PHOTO,
-            progress=progress,
-            progress_args=(message, "trying to download and set profile picture"),
-        )
-
-        await paimon.set_profile_photo(photo=PHOTO)
+        with Workspace("setpfp") as work:
+            photo = await paimon.download_media(
+                message=replied,
+                file_name=work.file("profile_pic.jpg"),
+                progress=progress,
+                progress_args=(message, "trying to download and set profile picture"),
+            )
+            await paimon.set_profile_photo(photo=photo)
 
-        if os.path.exists(PHOTO):
-            os.remove(PHOTO)
         e_time = datetime.now()
         t_time = (e_time - s_time).seconds
         await message.edit(f"`Profile picture set in {t_time} seconds.`")
 
     elif replied and replied.media and (replied.video or replied.animation):
-        VIDEO = Config.DOWN_PATH + "profile_vid.mp4"
-        await paimon.download_media(
-            message=replied,
-            file_name=VIDEO,
-            progress=progress,
-            progress_args=(message, "trying to download and set profile picture"),
-        )
-
         try:
-            await paimon.set_profile_photo(video=VIDEO)
+            with Workspace("setpfp") as work:
+                video = await paimon.download_media(
+                    message=replied,
+                    file_name=work.file("profile_vid.mp4"),
+                    progress=progress,
+                    progress_args=(message, "trying to download and set profile picture"),
+                )
+                await paimon.set_profile_photo(video=video)
         except VideoFileInvalid:
             await message.err("Video File is Invalid")
         else:
@@ -356,17 +356,16 @@ async def clone_(message: Message):
         )  # 70 is the max bio limit
         await message.edit("```Bio is Successfully Cloned ...```", del_in=3)
     elif "-pp" in message.flags:
-        if os.path.exists(PHOTO):
+        if PHOTO_CLONED:
             await message.err("First Revert!...")
             return
         if not user.photo:
             await message.err("User not have any profile pic...")
             return
-        await paimon.download_media(user.photo.big_file_id, file_name=PHOTO)
-        await paimon.set_profile_photo(photo=PHOTO)
+        await _clone_photo(user)
         await message.edit("```Profile photo is Successfully Cloned ...```", del_in=3)
     else:
-        if USER_DATA or os.path.exists(PHOTO):
+        if USER_DATA or PHOTO_CLONED:
             await message.err("First Revert!...")
             return
         mychat = await paimon.get_chat(me.id)
@@ -387,11 +386,18 @@ async def clone_(message: Message):
                 "`User not have profile photo, Cloned Name and bio...`", del_in=5
             )
             return
-        await paimon.download_media(user.photo.big_file_id, file_name=PHOTO)
-        await paimon.set_profile_photo(photo=PHOTO)
+        await _clone_photo(user)
         await message.edit("```Profile is Successfully Cloned ...```", del_in=3)
 
 
+async def _clone_photo(user) -> None:
+    global PHOTO_CLONED  # pylint: disable=global-statement
+    async with media_cache.fetch_file(
+            paimon, user.photo.big_file_id, user.photo.big_file_unique_id) as photo:
+        await paimon.set_profile_photo(photo=photo)
+    PHOTO_CLONED = True
+
+
 @paimon.on_cmd(
     "revert",
     about={"header": "Returns original profile", "usage": "{tr}revert"},
@@ -399,17 +405,18 @@ async def clone_(message: Message):
 )
 async def revert_(message: Message):
     """ Returns Original Profile """
-    if not (USER_DATA or os.path.exists(PHOTO)):
+    global PHOTO_CLONED  # pylint: disable=global-statement
+    if not (USER_DATA or PHOTO_CLONED):
         await message.err("Already Reverted!...")
         return
     if USER_DATA:
         await paimon.update_profile(**USER_DATA)
         USER_DATA.clear()
-    if os.path.exists(PHOTO):
+    if PHOTO_CLONED:
         me = await paimon.get_me()
         photo = (await paimon.get_profile_photos(me.id, limit=1))[0]
         await paimon.delete_profile_photos(photo.file_id)
-        os.remove(PHOTO)
+        PHOTO_CLONED = False
     await message.edit("```Profile is Successfully Reverted...```", del_in=3)
 
 
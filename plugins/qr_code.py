@@ -3,11 +3,13 @@
 # by @krishna_singhal
 
 import asyncio
-import os
 
 import qrcode
 from bs4 import BeautifulSoup
-from paimon import Config, Message, paimon
+from paimon import Message, paimon
+from resources.memfile import to_file
+from resources.output_cache import output_key, remember, send_cached
+from resources.workspace import Workspace
 
 
 @paimon.on_cmd(
@@ -28,6 +30,11 @@ async def make_qr(message: Message):
     else:
         await message.err("```Input not found...```")
         return
+    reply_id = replied.message_id if replied else None
+    key = output_key(paimon, "mkqr", text)
+    if await send_cached(paimon, message.chat.id, key, reply_id):
+        await message.delete()
+        return
     await message.edit("```Creating a Qr Code...```")
     qr = qrcode.QRCode(
         version=1,
@@ -38,14 +45,13 @@ async def make_qr(message: Message):
     qr.add_data(text)
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
-    img.save("qrcode.webp", "PNG")
     await message.delete()
-    await paimon.send_sticker(
+    sent = await paimon.send_sticker(
         message.chat.id,
-        "qrcode.webp",
-        reply_to_message_id=replied.message_id if replied else None,
+        to_file(img, "qrcode.webp", "PNG"),
+        reply_to_message_id=reply_id,
     )
-    os.remove("qrcode.webp")
+    await remember(key, sent)
 
 
 @paimon.on_cmd(
@@ -61,31 +67,29 @@ async def get_qr(message: Message):
     if not (replied and replied.media and (replied.photo or replied.sticker)):
         await message.err("```reply to qr code to get data...```", del_in=5)
         return
-    if not os.path.isdir(Config.DOWN_PATH):
-        os.makedirs(Config.DOWN_PATH)
     await message.edit("```Downloading media to my local...```")
-    down_load = await message.client.download_media(
-        message=replied, file_name=Config.DOWN_PATH
-    )
-    await message.edit("```Processing your QR Code...```")
-    cmd = [
-        "curl",
-        "-X",
-        "POST",
-        "-F",
-        "f=@" + down_load + "",
-        "https://zxing.org/w/decode",
-    ]
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await process.communicate()
+    with Workspace("getqr") as work:
+        down_load = await message.client.download_media(
+            message=replied, file_name=work.down_path
+        )
+        await message.edit("```Processing your QR Code...```")
+        cmd = [
+            "curl",
+            "-X",
+            "POST",
+            "-F",
+            "f=@" + down_load + "",
+            "https://zxing.org/w/decode",
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
 
     out_response = stdout.decode().strip()
     err_response = stderr.decode().strip()
-    os.remove(down_load)
 
     if not (out_response or err_response):
         await message.err("```Couldn't get data of this QR Code...```")
@@ -1,10 +1,11 @@
 import os
 from datetime import datetime
 
-import requests
+from aiohttp import FormData
 from bs4 import BeautifulSoup
 from paimon import Config, Message, paimon
 from paimon.utils import take_screen_shot
+from resources import http_client
 
 
 @paimon.on_cmd(
@@ -43,13 +44,13 @@ async def google_rs(message: Message):
         base_url = "http://www.google.com"
         if dis_loc:
             search_url = "{}/searchbyimage/upload".format(base_url)
-            multipart = {
-                "encoded_image": (dis_loc, open(dis_loc, "rb")),
-                "image_content": "",
-            }
-            google_rs_response = requests.post(
-                search_url, files=multipart, allow_redirects=False
-            )
+            with open(dis_loc, "rb") as image_:
+                multipart = FormData()
+                multipart.add_field("encoded_image", image_, filename=dis_loc)
+                multipart.add_field("image_content", "")
+                google_rs_response = await http_client.post(
+                    search_url, data=multipart, allow_redirects=False
+                )
             the_location = google_rs_response.headers.get("Location")
             os.remove(dis_loc)
         else:
@@ -59,7 +60,7 @@ async def google_rs(message: Message):
         headers = {
             "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:58.0) Gecko/20100101 Firefox/58.0"
         }
-        response = requests.get(the_location, headers=headers)
+        response = await http_client.get(the_location, headers=headers)
         soup = BeautifulSoup(response.text, "html.parser")
         try:
             prs_div = soup.find_all("div", {"class": "r5a77d"})[0]
@@ -1,9 +1,14 @@
-import os
 import random
 import textwrap
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+from pyrogram.errors import RPCError
 from paimon import Message, paimon
+from paimon.utils.exceptions import ProcessCanceled
+from resources import assets
+from resources.memfile import to_file
+from resources.process_pool import run_in_process
+from resources.textfit import fit_size, load_font, measure
 
 
 @paimon.on_cmd(
@@ -25,13 +30,30 @@ async def sticklet(message: Message):
     if not sticktext:
         await message.edit("**Bruh** ~`I need some text to make sticklet`")
         return
-    await message.delete()
 
     if message.reply_to_message:
         reply_to = message.reply_to_message.message_id
     else:
         reply_to = message.message_id
 
+    font_file = await get_font_file()
+    if not font_file:
+        await message.err("Couldn't get a font from @FontsRes, try again later", del_in=5)
+        return
+    try:
+        sticker = await run_in_process(
+            draw_sticklet, sticktext, font_file, (R, G, B), message=message)
+    except ProcessCanceled as p_c:
+        await message.err(str(p_c), del_in=5)
+        return
+    await message.delete()
+
+    await paimon.send_sticker(
+        chat_id=message.chat.id, sticker=sticker, reply_to_message_id=reply_to
+    )
+
+
+def draw_sticklet(sticktext, font_file, fill):
     # https://docs.python.org/3/library/textwrap.html#textwrap.wrap
 
     sticktext = textwrap.wrap(sticktext, width=10)
@@ -39,36 +61,21 @@ async def sticklet(message: Message):
 
     image = Image.new("RGBA", (512, 512), (255, 255, 255, 0))
     draw = ImageDraw.Draw(image)
-    fontsize = 230
-
-    font_file = await get_font_file()
-    font = ImageFont.truetype(font_file, size=fontsize)
+    fontsize = fit_size(font_file, sticktext, (512, 512), 230)
+    font = load_font(font_file, fontsize)
 
-    while draw.multiline_textsize(sticktext, font=font) > (512, 512):
-        fontsize -= 3
-        font = ImageFont.truetype(font_file, size=fontsize)
-
-    width, height = draw.multiline_textsize(sticktext, font=font)
+    width, height = measure(font_file, fontsize, sticktext)
     draw.multiline_text(
-        ((512 - width) / 2, (512 - height) / 2), sticktext, font=font, fill=(R, G, B)
-    )
-
-    image_name = "rgb_sticklet.webp"
-    image.save(image_name, "WebP")
-
-    await paimon.send_sticker(
-        chat_id=message.chat.id, sticker=image_name, reply_to_message_id=reply_to
+        ((512 - width) / 2, (512 - height) / 2), sticktext, font=font, fill=fill
     )
 
-    # cleanup
-    try:
-        os.remove(font_file)
-        os.remove(image_name)
-    except Exception:
-        pass
+    return to_file(image, "rgb_sticklet.webp")
 
 
 async def get_font_file():
-    font_file_message_s = await paimon.get_history("@FontsRes")
-    font_file_message = random.choice(font_file_message_s)
-    return await paimon.download_media(font_file_message)
+    # fonts of @FontsRes are downloaded once into the asset store
+    try:
+        fonts = await assets.channel_files("@FontsRes")
+    except RPCError:
+        return None
+    return random.choice(fonts) if fonts else None
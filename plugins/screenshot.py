@@ -1,11 +1,12 @@
 import asyncio
-import os
 import random
 
 from hachoir.metadata import extractMetadata as XMan
 from hachoir.parser import createParser as CPR
-from paimon import Config, Message, paimon
-from paimon.utils import progress, take_screen_shot
+from paimon import Message, paimon
+from paimon.utils import take_screen_shot
+from resources import media_cache
+from resources.workspace import Workspace
 
 
 @paimon.on_cmd(
@@ -31,38 +32,38 @@ async def ss_gen(message: Message):
                 ss_c = int(message.input_str)
             except ValueError:
                 vid_loc = message.input_str
-                should_clean = False
 
     if replied:
         if not replied.video:
             await message.edit("I doubt it is a video")
             return
         await message.edit("Downloading Video to my Local")
-        vid = await message.client.download_media(
-            message=replied,
-            file_name=Config.DOWN_PATH,
-            progress=progress,
-            progress_args=(message, "Downloading🧐? W8 plox"),
-        )
-        vid_loc = os.path.join(Config.DOWN_PATH, os.path.basename(vid))
-        should_clean = True
+        async with media_cache.fetch(
+                replied, message, "Downloading🧐? W8 plox") as vid_loc:
+            done = await _screen_shots(message, vid_loc, ss_c)
+    else:
+        done = await _screen_shots(message, vid_loc, ss_c)
+    if done:
+        await asyncio.sleep(0.5)
+        await message.delete()
+
+
+async def _screen_shots(message: Message, vid_loc: str, ss_c: int) -> bool:
     await message.edit("Compiling Resources")
     meta = XMan(CPR(vid_loc))
     if meta and meta.has("duration"):
         vid_len = meta.get("duration").seconds
     else:
         await message.edit("Something went wrong, Not able to gather metadata")
-        return
+        return False
     await message.edit("Done, Generating Screen Shots and uploading")
     try:
-        for frames in random.sample(range(vid_len), ss_c):
-            capture = await take_screen_shot(vid_loc, int(frames), "ss_cap.jpeg")
-            await message.client.send_photo(chat_id=message.chat.id, photo=capture)
-            os.remove(capture)
+        with Workspace("ss") as work:
+            for frames in random.sample(range(vid_len), ss_c):
+                capture = await take_screen_shot(
+                    vid_loc, int(frames), work.file(f"ss_cap_{frames}.jpeg"))
+                await message.client.send_photo(chat_id=message.chat.id, photo=capture)
         await message.edit("Uploaded")
     except Exception as e:
         await message.edit(e)
-    if should_clean:
-        os.remove(vid_loc)
-    await asyncio.sleep(0.5)
-    await message.delete()
+    return True
@@ -4,7 +4,8 @@
 import time
 
 from paimon import Message, paimon
-from paimon.utils import post_to_telegraph, time_formatter
+from paimon.utils import time_formatter
+from resources import telegraph
 
 from ..utils.telegraph import upload_media_
 
@@ -51,9 +52,9 @@ async def tele_text(message: Message):
     title = message.filtered_input_str
     if not title:
         title = f"By {user_n}"
-    link = post_to_telegraph(title, text)
+    link = await telegraph.post_page(title, text, author_name=user_n)
     msg = "**Pasted to -** "
-    msg += f"<b><a href={link}>{link.replace('http://telegra.ph/', '')}</a></b>\n"
+    msg += f"<b><a href={link}>{link.split('telegra.ph/', 1)[-1]}</a></b>\n"
     end = time.time()
     msg += f"in <code>{time_formatter(end - start)}</code> sec"
     await message.edit(msg, disable_web_page_preview=True)
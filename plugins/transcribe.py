@@ -1,16 +1,15 @@
-import io
 import os
 import re
 import traceback
 from asyncio import sleep
 
-from aiohttp import ClientSession
 from pydub import AudioSegment
 from pydub.exceptions import CouldntDecodeError
 
 from paimon import paimon, Message, Config
-from paimon.plugins.misc.download import tg_download, url_download
+from paimon.plugins.misc.download import url_download
 from paimon.utils.exceptions import ProcessCanceled
+from resources import http_client, media_cache
 
 logger = paimon.getLogger(__name__)
 
@@ -47,13 +46,11 @@ class WitAiAPI:
             'content-type': 'audio/raw;encoding=signed-integer;bits=16;rate=8000;endian=little',
         }
         try:
-            async with ClientSession() as session:
-                async with session.post(
-                        f"{self.api_url}/speech", headers=headers,
-                        data=io.BufferedReader(io.BytesIO(chunk.raw_data))) as resp:
-                    if resp.status == 200:
-                        response = await resp.json()
-                        text = response['_text'] if '_text' in response else response['text']
+            resp = await http_client.post(
+                f"{self.api_url}/speech", headers=headers, data=chunk.raw_data)
+            if resp.status == 200:
+                response = resp.json()
+                text = response['_text'] if '_text' in response else response['text']
         except Exception as e:
             error = f"Could not transcribe chunk: {e}\n{traceback.format_exc()}"
 
@@ -122,43 +119,35 @@ async def stt_(message: Message):
     if not api.has_api_key():
         await message.edit(f'`Please set WIT_AI_API_{lang.upper()} variable first!`')
         return
+    if replied and replied.media:
+        # Try to get file name from the media file.
+        media = replied.audio or replied.video or replied.document
+        file_name = getattr(media, 'file_name', None) or ""
+        try:
+            async with media_cache.fetch(replied, message) as dl_loc:
+                await _transcribe(message, api, dl_loc,
+                                  file_name or os.path.basename(dl_loc),
+                                  lang, send_text, message_id)
+        except ProcessCanceled:
+            await message.edit("`Process Canceled!`", del_in=5)
+        except Exception as e_e:
+            await message.err(e_e)
+        return
     dl_loc = ""
     file_name = ""
-    if replied and replied.media:
+    input_str = match.group(2) if match.group(2) else ""
+    is_url = re.search(
+        r"(?:https?|ftp)://[^|\s]+\.[^|\s]+", input_str)
+    if is_url:
         try:
-            dl_loc, _ = await tg_download(message, replied)
-            # Try to get file name from the media file.
-            try:
-                if hasattr(replied.audio, 'file_name'):
-                    file_name = replied.audio.file_name
-                elif hasattr(replied.video, 'file_name'):
-                    file_name = replied.video.file_name
-                elif hasattr(replied.document, 'file_name'):
-                    file_name = replied.document.file_name
-                else:
-                    file_name = os.path.basename(dl_loc)
-            except AttributeError:
-                pass
+            dl_loc, _ = await url_download(message, message.filtered_input_str)
+            file_name = os.path.basename(dl_loc)
         except ProcessCanceled:
             await message.edit("`Process Canceled!`", del_in=5)
             return
         except Exception as e_e:
             await message.err(e_e)
             return
-    else:
-        input_str = match.group(2) if match.group(2) else ""
-        is_url = re.search(
-            r"(?:https?|ftp)://[^|\s]+\.[^|\s]+", input_str)
-        if is_url:
-            try:
-                dl_loc, _ = await url_download(message, message.filtered_input_str)
-                file_name = os.path.basename(dl_loc)
-            except ProcessCanceled:
-                await message.edit("`Process Canceled!`", del_in=5)
-                return
-            except Exception as e_e:
-                await message.err(e_e)
-                return
     if dl_loc:
         file_path = dl_loc
     else:
@@ -167,6 +156,11 @@ async def stt_(message: Message):
     if not os.path.exists(file_path):
         await message.err("`Seems that an invalid file path provided?`")
         return
+    await _transcribe(message, api, file_path, file_name, lang, send_text, message_id)
+
+
+async def _transcribe(message: Message, api: WitAiAPI, file_path: str, file_name: str,
+                      lang: str, send_text: bool, message_id: int) -> None:
     await message.edit("`Starting transcribing...`")
     processed = 0
     async for _, error in api.transcribe(file_path):
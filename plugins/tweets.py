@@ -4,17 +4,17 @@
 # @Mrconfused and catuserbot for the idea of nekobot API
 # Improved by code-rgb
 
-import os
+from io import BytesIO
 
-import requests
 from PIL import Image
-from paimon import Config, Message, paimon
+from paimon import Message, paimon
 from paimon.utils import deEmojify
+from resources import http_client
+from resources.breaker import CircuitOpenError
+from resources.memfile import to_file
+from resources.output_cache import output_key, remember, send_cached
 from validators.url import url
 
-CONVERTED_IMG = Config.DOWN_PATH + "img.png"
-CONVERTED_STIKR = Config.DOWN_PATH + "sticker.webp"
-
 
 @paimon.on_cmd(
     "trump",
@@ -155,33 +155,36 @@ async def tweet(msg: Message):
 async def _tweets(
     msg: Message, text: str, username: str = "", type_: str = "tweet"
 ) -> None:
+    msg_id = msg.reply_to_message.message_id if msg.reply_to_message else None
+    key = output_key(msg.client, "tweets", type_, text, username, "-s" in msg.flags)
+    if await send_cached(msg.client, msg.chat.id, key, msg_id):
+        await msg.delete()
+        return
     api_url = f"https://nekobot.xyz/api/imagegen?type={type_}&text={deEmojify(text)}"
     if username:
         api_url += f"&username={deEmojify(username)}"
-    res = requests.get(api_url).json()
+    try:
+        res = (await http_client.get(api_url)).json()
+    except CircuitOpenError as c_e:
+        await msg.err(str(c_e))
+        return
     tweets_ = res.get("message")
     if not url(tweets_):
         await msg.err("Invalid Syntax, Exiting...")
         return
-    tmp_file = Config.DOWN_PATH + "temp.png"
-    with open(tmp_file, "wb") as t_f:
-        t_f.write(requests.get(tweets_).content)
-    img = Image.open(tmp_file)
-    img.save(CONVERTED_IMG)
-    img.save(CONVERTED_STIKR)
+    img = Image.open(BytesIO((await http_client.get(tweets_)).content))
     await msg.delete()
-    msg_id = msg.reply_to_message.message_id if msg.reply_to_message else None
     if "-s" in msg.flags:
-        await msg.client.send_sticker(
-            chat_id=msg.chat.id, sticker=CONVERTED_STIKR, reply_to_message_id=msg_id
+        sent = await msg.client.send_sticker(
+            chat_id=msg.chat.id,
+            sticker=to_file(img, "sticker.webp"),
+            reply_to_message_id=msg_id,
         )
     else:
-        await msg.client.send_photo(
-            chat_id=msg.chat.id, photo=CONVERTED_IMG, reply_to_message_id=msg_id
+        sent = await msg.client.send_photo(
+            chat_id=msg.chat.id, photo=to_file(img, "img.png"), reply_to_message_id=msg_id
         )
-    os.remove(tmp_file)
-    os.remove(CONVERTED_IMG)
-    os.remove(CONVERTED_STIKR)
+    await remember(key, sent)
 
 
 @paimon.on_cmd(
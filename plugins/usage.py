@@ -1,8 +1,8 @@
 import asyncio
 import math
 
-import requests
 from paimon import Config, Message, paimon
+from resources import http_client
 
 
 @paimon.on_cmd("usage", about={"header": "Get Dyno hours usage"})
@@ -24,8 +24,8 @@ async def usage(message: Message):
         "Accept": "application/vnd.heroku+json; version=3.account-quotas",
     }
     path = "/accounts/" + u_id + "/actions/get-quota"
-    r = requests.get("https://api.heroku.com" + path, headers=headers)
-    if r.status_code != 200:
+    r = await http_client.get("https://api.heroku.com" + path, headers=headers)
+    if r.status != 200:
         return await message.edit(
             "`Error: something bad happened`\n\n" f">.`{r.reason}`\n"
         )
@@ -5,10 +5,12 @@
 import asyncio
 import json
 import os
+from typing import Optional
 
-import requests
-from paimon import Config, Message, paimon
-from paimon.utils import humanbytes, progress
+from aiohttp import FormData
+from paimon import Message, paimon
+from paimon.utils import humanbytes
+from resources import http_client, media_cache
 
 API_KEY = os.environ.get("VT_API_KEY", None)
 
@@ -38,18 +40,11 @@ async def _scan_file(msg: Message):
         await msg.err("this document is greater than 32MB.")
         return
     await msg.edit("`Downloading file to local...`")
-    dls_loc = await msg.client.download_media(
-        message=replied,
-        file_name=Config.DOWN_PATH,
-        progress=progress,
-        progress_args=(msg, "Downloading file to local..."),
-    )
-    dls = os.path.join(Config.DOWN_PATH, os.path.basename(dls_loc))
-    await msg.edit(
-        f"`Processing your file...`, **File_size:** `{humanbytes(size_of_file)}`"
-    )
-    response = scan_file(dls)
-    os.remove(dls)
+    async with media_cache.fetch(replied, msg, "Downloading file to local...") as dls:
+        await msg.edit(
+            f"`Processing your file...`, **File_size:** `{humanbytes(size_of_file)}`"
+        )
+        response = await scan_file(dls, replied.document.file_name)
     if response is False:
         await msg.err("this file can't be scan")
         return
@@ -64,7 +59,7 @@ async def _scan_file(msg: Message):
     ]
     viruslist, reasons = [], []
     sha1 = r.get("resource")
-    r_sha = get_report(sha1)
+    r_sha = await get_report(sha1)
     try:
         response = r_sha.json()
     except json.decoder.JSONDecodeError:
@@ -77,7 +72,7 @@ async def _scan_file(msg: Message):
         while response.get("verbose_msg") in que_msg:
             await asyncio.sleep(3)
             try:
-                response = get_report(sha1).json()
+                response = (await get_report(sha1)).json()
             except json.decoder.JSONDecodeError:
                 await asyncio.sleep(3)
     try:
@@ -106,20 +101,23 @@ async def _scan_file(msg: Message):
         await msg.edit("`File is clean`")
 
 
-def scan_file(path: str) -> str:
-    """ scan file """
+async def scan_file(path: str, file_name: Optional[str] = None) -> http_client.HttpResponse:
+    """ scan file, reported under ``file_name`` if given, the cached file is
+    stored under a hashed name """
     url = "https://www.virustotal.com/vtapi/v2/file/scan"
-    path_name = path.split("/")[-1]
+    path_name = file_name or path.split("/")[-1]
 
     params = {"apikey": API_KEY}
-    files = {"file": (path_name, open(path, "rb"))}
-    response = requests.post(url, files=files, params=params)
+    with open(path, "rb") as file_:
+        files = FormData()
+        files.add_field("file", file_, filename=path_name)
+        response = await http_client.post(url, data=files, params=params)
     return response
 
 
-def get_report(sha1: str) -> str:
+async def get_report(sha1: str) -> http_client.HttpResponse:
     """ get report of files """
     url = "https://www.virustotal.com/vtapi/v2/file/report"
     params = {"apikey": API_KEY, "resource": sha1, "allinfo": "False"}
-    response = requests.get(url, params=params)
+    response = await http_client.get(url, params=params)
     return response
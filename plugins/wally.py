@@ -3,13 +3,13 @@
 import os
 import wget
 import shutil
-import requests
 
 from pyrogram.types import InputMediaPhoto, InputMediaDocument
 from PIL import Image
 
 from paimon import paimon, Message, pool
 from paimon.plugins.misc import upload
+from resources import http_client
 
 @paimon.on_cmd("wally", about={
     'header': "Search Wallpaper",
@@ -30,11 +30,11 @@ async def wall_(msg: Message):
     if msg.filtered_input_str:
         qu = msg.filtered_input_str
         await msg.edit(f"`Seraching Wallpapers for {qu}`")
-        results = requests.get(
+        results = await http_client.get(
             "https://wallhaven.cc/api/v1/search"
         )
 
-        if results.status_code != 200:
+        if results.status != 200:
             return await msg.edit('**Result Not Found**')
         _json = results.json()['results']
         if len(_json) < limit:
@@ -5,7 +5,8 @@
 import os
 
 from justwatch import JustWatch, justwatchapi
-from paimon import Message, paimon
+from paimon import Message, paimon, pool
+from resources.cache import cached
 
 # https://github.com/dawoudt/JustWatchAPI/issues/47#issuecomment-691357371
 justwatchapi.__dict__["HEADER"] = {
@@ -61,6 +62,11 @@ def get_stream_data(query):
     return stream_data
 
 
+@cached("justwatch", ttl=6 * 3600, persist=True)
+async def _get_stream_data(query):
+    return await pool.run_in_thread(get_stream_data)(query)
+
+
 @paimon.on_cmd(
     "watch",
     about={
@@ -72,7 +78,7 @@ def get_stream_data(query):
 async def fetch_watch_sources(message: Message):
     await message.edit("Finding Sites...")
     query = message.input_str
-    streams = get_stream_data(query)
+    streams = await _get_stream_data(query)
     title = streams["title"]
     thumb_link = streams["movie_thumb"]
     release_year = streams["release_year"]
@@ -1,8 +1,7 @@
 
 from aiofiles import os
-from telegraph import upload_file
-
-from paimon import paimon, Config, Message, pool
+from paimon import paimon, Config, Message
+from resources import telegraph
 
 
 @paimon.on_cmd("yrs", about={
@@ -22,11 +21,11 @@ async def labstack(message: Message):
         return await message.err("Media not found!")
 
     try:
-        response = await pool.run_in_thread(upload_file)(dl_loc)
+        response = await telegraph.upload_file(dl_loc)
     except Exception as t_e:
         await message.err(str(t_e))
     else:
-        media_link = f"https://telegra.ph{response[0]}"
+        media_link = f"https://telegra.ph{response}"
         yandex_link = f"https://yandex.com/images/search?rpt=imageview&url={media_link}"
         await message.edit(f"**[Yandex Search Results]({yandex_link})**")
     finally:
@@ -52,11 +51,11 @@ async def labstack(message: Message):
         return await message.err("Media not found!")
 
     try:
-        response = await pool.run_in_thread(upload_file)(dl_loc)
+        response = await telegraph.upload_file(dl_loc)
     except Exception as t_e:
         await message.err(str(t_e))
     else:
-        media_link = f"https://telegra.ph{response[0]}"
+        media_link = f"https://telegra.ph{response}"
         google_link = f"https://www.google.com/searchbyimage?={media_link}"
         await message.edit(f"**[google Search Results]({google_link})**")
     finally:
@@ -0,0 +1,168 @@
+""" Registry of rendering assets (fonts, base images) """
+
+# Remote assets are downloaded once into a content addressed store under
+# Config.DOWN_PATH and found again through a small index, across restarts
+# too. Decoded fonts and images are held in bounded in-memory caches. The
+# rendering happens in the process pool, so prewarm() fetches the assets
+# at startup and has every pool worker load them as it starts. Channels
+# are listed up to CHANNEL_FILES documents.
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from paimon import Config, paimon
+from resources import http_client
+from resources.process_pool import on_worker_start
+from resources.singleflight import SingleFlight
+from resources.textfit import load_font
+
+ASSETS_PATH = os.path.join(Config.DOWN_PATH, "assets")
+_INDEX_FILE = os.path.join(ASSETS_PATH, "index.json")
+
+_LOG = paimon.getLogger(__name__)
+_FLIGHTS = SingleFlight()
+# source (url / telegram file) -> stored file name
+_INDEX: Dict[str, str] = {}
+_CHANNELS: Dict[str, List[str]] = {}
+# source (url / local path) -> font sizes to preload
+_REGISTERED: Dict[str, Tuple[int, ...]] = {}
+_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+# newest documents of a channel that are used
+CHANNEL_FILES = 20
+# assets every process pool worker loads as it starts
+_WARMED: List[str] = []
+
+
+class AssetError(Exception):
+    """ an asset couldn't be fetched """
+
+
+def _load_index() -> None:
+    if not _INDEX and os.path.exists(_INDEX_FILE):
+        with open(_INDEX_FILE) as index:
+            _INDEX.update(json.load(index))
+
+
+def _save_index() -> None:
+    tmp = _INDEX_FILE + ".tmp"
+    with open(tmp, "w") as index:
+        json.dump(_INDEX, index)
+    os.replace(tmp, _INDEX_FILE)
+
+
+def _lookup(source: str) -> Optional[str]:
+    _load_index()
+    name = _INDEX.get(source)
+    if name:
+        path = os.path.join(ASSETS_PATH, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _store(source: str, data: bytes, ext: str) -> str:
+    """ saves data under its sha256, identical files are stored once """
+    os.makedirs(ASSETS_PATH, exist_ok=True)
+    name = hashlib.sha256(data).hexdigest() + ext.lower()
+    path = os.path.join(ASSETS_PATH, name)
+    if not os.path.exists(path):
+        with open(path + ".tmp", "wb") as file_:
+            file_.write(data)
+        os.replace(path + ".tmp", path)
+    _INDEX[source] = name
+    _save_index()
+    return path
+
+
+async def _download(url: str) -> str:
+    resp = await http_client.get(url)
+    if not resp.ok:
+        raise AssetError(f"couldn't fetch {url} [{resp.status}]")
+    return _store(url, resp.content, os.path.splitext(url)[1])
+
+
+async def fetch(url: str) -> str:
+    """ local path of a remote asset, downloaded only the first time """
+    return _lookup(url) or await _FLIGHTS.do(url, _download, url)
+
+
+async def _channel_files(chat: str) -> List[str]:
+    paths = []
+    for msg in await paimon.get_history(chat, limit=CHANNEL_FILES):
+        if not msg.document:
+            continue
+        source = f"tg:{msg.document.file_unique_id}"
+        path = _lookup(source)
+        if not path:
+            dls = await paimon.download_media(
+                msg, file_name=os.path.join(ASSETS_PATH, "tmp") + "/")
+            with open(dls, "rb") as file_:
+                data = file_.read()
+            os.remove(dls)
+            path = _store(source, data, os.path.splitext(dls)[1])
+        paths.append(path)
+    return paths
+
+
+async def channel_files(chat: str) -> List[str]:
+    """ local paths of the files posted in a channel, e.g. @FontsRes """
+    if not _CHANNELS.get(chat):
+        _CHANNELS[chat] = await _FLIGHTS.do(("channel", chat), _channel_files, chat)
+    return _CHANNELS[chat]
+
+
+@lru_cache(maxsize=32)
+def open_image(path: str) -> Image.Image:
+    """ decoded base image, shared by callers, copy() it before drawing on it """
+    img = Image.open(path)
+    img.load()
+    return img
+
+
+def register(source: str, *font_sizes: int) -> None:
+    """ marks an url or a local file for prewarm(), fonts at the given sizes """
+    _REGISTERED[source] = tuple(sorted(set(_REGISTERED.get(source, ()) + font_sizes)))
+
+
+def warm(path: str, font_sizes: Tuple[int, ...]) -> None:
+    """ loads an asset into this process' caches """
+    for size in font_sizes:
+        load_font(path, size)
+    if path.lower().endswith(_IMAGE_EXTS):
+        open_image(path)
+
+
+async def prewarm(*channels: str) -> None:
+    """ fetches every registered asset and the channels' files, the
+    registered ones get loaded by every process pool worker """
+    for source, font_sizes in list(_REGISTERED.items()):
+        try:
+            path = await fetch(source) if "://" in source else source
+            on_worker_start(warm, path, font_sizes)
+            _WARMED.append(path)
+        except Exception as e_x:  # pylint: disable=broad-except
+            _LOG.error(f"asset {source}: {e_x}")
+    for chat in channels:
+        try:
+            await channel_files(chat)
+        except Exception as e_x:  # pylint: disable=broad-except
+            _LOG.error(f"asset channel {chat}: {e_x}")
+
+
+def warmed() -> int:
+    """ number of assets the process pool workers load as they start """
+    return len(_WARMED)
+
+
+def stats() -> Tuple[int, int]:
+    """ (stored files, total bytes) of the local store """
+    if not os.path.isdir(ASSETS_PATH):
+        return 0, 0
+    files = [os.path.join(ASSETS_PATH, name) for name in os.listdir(ASSETS_PATH)
+             if name != "index.json" and os.path.isfile(os.path.join(ASSETS_PATH, name))]
+    return len(files), sum(os.path.getsize(path) for path in files)
@@ -0,0 +1,77 @@
+""" Per-host circuit breaker for flaky third-party APIs """
+
+# After BREAKER_THRESHOLD consecutive failures (network errors, timeouts
+# or 5xx) a host's circuit opens and calls to it fail fast for
+# BREAKER_COOLDOWN seconds. After that a single probe request is let
+# through (half-open): success closes the circuit, failure re-opens it.
+
+import os
+import time
+from typing import Dict
+
+BREAKER_THRESHOLD = int(os.environ.get("BREAKER_THRESHOLD") or 5)
+BREAKER_COOLDOWN = int(os.environ.get("BREAKER_COOLDOWN") or 60)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """ raised instead of calling a host whose circuit is open """
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} is down, try again in {int(retry_in) + 1}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """ tracks consecutive failures of one endpoint """
+
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD,
+                 cooldown: int = BREAKER_COOLDOWN) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started = 0.0
+
+    def before_call(self) -> None:
+        """ raises CircuitOpenError if the call must not go through """
+        if self.state == CLOSED:
+            return
+        retry_in = self.opened_at + self.cooldown - time.time()
+        if self.state == OPEN and retry_in <= 0:
+            self.state = HALF_OPEN
+            self._probe_started = 0.0
+        # a probe that never reported back (e.g. cancelled) is given up on
+        if (self.state == HALF_OPEN
+                and time.time() - self._probe_started > self.cooldown):
+            self._probe_started = time.time()
+            return
+        raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self.state = OPEN
+            self.opened_at = time.time()
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in BREAKERS:
+        BREAKERS[name] = CircuitBreaker(name)
+    return BREAKERS[name]
@@ -0,0 +1,117 @@
+""" TTL + LRU cache for external metadata lookups """
+
+# Every cache is a bounded in-memory LRU whose entries expire after a
+# per-source TTL. Caches created with ``persist=True`` also keep a copy
+# in Mongo, so warm entries survive a restart. Concurrent misses for the
+# same key are coalesced into a single upstream call.
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from paimon import get_collection
+
+from resources.singleflight import SingleFlight
+
+_MISSING = object()
+_PERSISTED = get_collection("API_CACHE")
+
+CACHES: Dict[str, "TTLCache"] = {}
+FLIGHTS = SingleFlight()
+
+
+def normalize(*args: Any, **kwargs: Any) -> str:
+    """ builds a cache key that ignores case and extra whitespace in queries """
+    parts = []
+    for arg in args + tuple(f"{k}={v}" for k, v in sorted(kwargs.items())):
+        if isinstance(arg, str):
+            arg = re.sub(r"\s+", " ", arg.strip().lower())
+        elif isinstance(arg, dict):
+            arg = normalize(**arg)
+        parts.append(str(arg))
+    return "|".join(parts)
+
+
+class TTLCache:
+    """ in-memory LRU with expiring entries and an optional mongo tier """
+
+    def __init__(self, name: str, ttl: int, maxsize: int = 128,
+                 persist: bool = False) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.persist = persist
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        CACHES[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.time():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        if self.persist:
+            doc = await _PERSISTED.find_one({'_id': f"{self.name}:{key}"})
+            if doc and doc['expires'] > time.time():
+                self._store(key, doc['data'], doc['expires'])
+                self.hits += 1
+                return doc['data']
+        self.misses += 1
+        return _MISSING
+
+    async def set(self, key: str, value: Any) -> None:
+        expires = time.time() + self.ttl
+        self._store(key, value, expires)
+        if self.persist:
+            await _PERSISTED.update_one(
+                {'_id': f"{self.name}:{key}"},
+                {"$set": {'data': value, 'expires': expires}}, upsert=True)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = 0
+        if self.persist:
+            await _PERSISTED.delete_many({'_id': {"$regex": f"^{re.escape(self.name)}:"}})
+
+    def _store(self, key: str, value: Any, expires: float) -> None:
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+def cached(name: str, ttl: int, maxsize: int = 128, persist: bool = False,
+           cache_if: Optional[Callable[[Any], bool]] = None
+           ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """ caches the result of a coroutine function by its normalized arguments """
+    cache = TTLCache(name, ttl, maxsize, persist)
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = hashlib.sha1(normalize(*args, **kwargs).encode()).hexdigest()
+            value = await cache.get(key)
+            if value is _MISSING:
+                value = await FLIGHTS.do((name, key), _fill, key, *args, **kwargs)
+            return value
+
+        async def _fill(key: str, *args: Any, **kwargs: Any) -> Any:
+            value = await func(*args, **kwargs)
+            if cache_if is None or cache_if(value):
+                await cache.set(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
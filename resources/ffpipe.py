@@ -0,0 +1,137 @@
+""" Streaming raw RGB frames through ffmpeg pipes """
+
+# Frames are decoded from / encoded into ffmpeg over stdin / stdout as raw
+# rgb24, so rendering a clip never writes per-frame files to disk. ordered()
+# keeps a bounded number of frame jobs in flight and yields their results
+# in order, which bounds memory for long clips.
+
+import asyncio
+import os
+import subprocess
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Awaitable, Optional, Tuple
+
+from paimon.utils import runcmd
+
+# libx264 output playable by telegram clients
+H264 = ("-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p")
+
+
+def even(num: int) -> int:
+    """ libx264 wants even dimensions """
+    return max(num // 2 * 2, 2)
+
+
+async def probe(src: str) -> Optional[Tuple[int, int, str]]:
+    """ returns (width, height, frame rate) of the first video stream """
+    out = (await runcmd(
+        "ffprobe -v error -select_streams v:0 -show_entries "
+        f"stream=width,height,r_frame_rate -of csv=p=0 \"{src}\""))[0]
+    try:
+        width, height, rate = out.strip().split(",")[:3]
+        return int(width), int(height), rate
+    except ValueError:
+        return None
+
+
+async def decode(src: str, size: Tuple[int, int],
+                 limit: Optional[int] = None) -> AsyncIterator[bytes]:
+    """ yields the frames of ``src`` scaled to ``size`` as rgb24 bytes, up to ``limit`` """
+    width, height = size
+    frames = ("-frames:v", str(limit)) if limit is not None else ()
+    # ffmpeg reads commands from stdin, it must not get the bot's terminal
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-v", "error", "-i", src, "-an", *frames,
+        "-vf", f"scale={width}:{height}", "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "pipe:1", stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE)
+    frame_size = width * height * 3
+    try:
+        while True:
+            try:
+                frame = await proc.stdout.readexactly(frame_size)
+            except asyncio.IncompleteReadError:
+                break
+            yield frame
+        await proc.wait()
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+def first_frame_png(src: str) -> bytes:
+    """ the first frame of ``src`` as png, empty if it couldn't be decoded
+
+    blocking, for process pool jobs """
+    return subprocess.run(
+        ("ffmpeg", "-v", "error", "-i", src, "-frames:v", "1",
+         "-f", "image2pipe", "-c:v", "png", "pipe:1"),
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, check=False).stdout
+
+
+async def ordered(jobs: AsyncIterable[Awaitable[bytes]],
+                  limit: int) -> AsyncIterator[bytes]:
+    """ runs up to ``limit`` jobs ahead and yields their results in order """
+    pending = deque()
+    try:
+        async for job in jobs:
+            pending.append(asyncio.ensure_future(job))
+            if len(pending) >= limit:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if hasattr(jobs, "aclose"):
+            await jobs.aclose()
+
+
+async def encode(frames: AsyncIterable[bytes], size: Tuple[int, int],
+                 rate: str, output: str, *args: str) -> bool:
+    """ pipes rgb24 ``frames`` into ffmpeg, ``args`` go after the pipe input
+
+    returns True if ``output`` was written """
+    width, height = size
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-v", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-s", f"{width}x{height}", "-r", str(rate), "-i", "pipe:0", *args, output,
+        stdin=asyncio.subprocess.PIPE)
+    try:
+        async for frame in frames:
+            proc.stdin.write(frame)
+            await proc.stdin.drain()
+        proc.stdin.close()
+        await proc.wait()
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+    finally:
+        if hasattr(frames, "aclose"):
+            await frames.aclose()
+    return proc.returncode == 0 and os.path.exists(output)
+
+
+async def overlay(src: str, image: bytes, size: Tuple[int, int], output: str) -> bool:
+    """ composites the png ``image`` over every frame of ``src`` scaled to ``size``
+
+    the image is piped in, ffmpeg decodes, blends and encodes in one pass """
+    width, height = size
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-v", "error", "-y", "-i", src, "-f", "png_pipe", "-i", "pipe:0",
+        "-filter_complex", f"[0:v]scale={width}:{height}[base];[base][1:v]overlay=0:0[out]",
+        "-map", "[out]", "-map", "0:a?", "-c:a", "copy", *H264, output,
+        stdin=asyncio.subprocess.PIPE)
+    try:
+        await proc.communicate(image)
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return proc.returncode == 0 and os.path.exists(output)
@@ -0,0 +1,149 @@
+""" Decoding any telegram media into frames, in memory """
+
+# One decode stage for everything a media command can be replied to:
+# photos and webp stickers are decoded by PIL, animated stickers (tgs) are
+# rendered by lottie inside the process, and clips (gifs, videos, webm
+# stickers) are read from an ffmpeg pipe. No kind goes through a temp file
+# or a converter subprocess. probe() and decode() behave the same for all
+# of them, so a command that handles clips handles animated stickers too,
+# and first_frame() gives the still that image commands draw on.
+
+from functools import lru_cache
+from io import BytesIO
+from typing import AsyncIterator, List, Optional, Tuple
+
+from PIL import Image, ImageSequence
+
+from paimon import Message
+from resources import ffpipe
+from resources.process_pool import run_in_process
+
+# frames rendered by one process pool job
+FRAME_CHUNK = 8
+_IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def is_tgs(path: str) -> bool:
+    return path.lower().endswith(".tgs")
+
+
+def _is_image(path: str) -> bool:
+    return path.lower().endswith(_IMAGE_EXTS)
+
+
+@lru_cache(maxsize=8)
+def _animation(path: str):
+    # parsed once per worker, every chunk of a sticker reuses it
+    # lottie (and cairosvg, which needs libcairo) are loaded only once a
+    # sticker is rendered, commands that never get one work without them
+    from lottie.parsers.tgs import parse_tgs  # pylint: disable=import-outside-toplevel
+    return parse_tgs(path)
+
+
+def tgs_info(path: str) -> Tuple[int, int, str, int]:
+    """ (width, height, frame rate, frame count) of a tgs sticker """
+    animation = _animation(path)
+    count = int(animation.out_point) - int(animation.in_point)
+    return (int(animation.width), int(animation.height),
+            str(animation.frame_rate), max(count, 1))
+
+
+def _image_info(path: str) -> Tuple[int, int, str]:
+    with Image.open(path) as img:
+        # ffprobe reports 25 fps for stills as well
+        rate = "25/1"
+        if getattr(img, "n_frames", 1) > 1:
+            # webp sets the frame duration only once a frame is loaded
+            img.load()
+            rate = f"1000/{img.info.get('duration') or 40}"
+        return img.width, img.height, rate
+
+
+def _tgs_frame(path: str, index: int,
+               size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    # pylint: disable=import-outside-toplevel
+    import cairosvg
+    from lottie.exporters.svg import export_svg
+    animation = _animation(path)
+    svg = BytesIO()
+    export_svg(animation, svg, int(animation.in_point) + index, pretty=False)
+    width, height = size or (int(animation.width), int(animation.height))
+    # drawn straight at the output size, vectors don't need a resize
+    png = cairosvg.svg2png(
+        bytestring=svg.getvalue(), output_width=width, output_height=height)
+    return Image.open(BytesIO(png))
+
+
+def first_frame(path: str) -> Image.Image:
+    """ the first frame of any media file, decoded in memory
+
+    blocking, call it from process pool jobs """
+    if is_tgs(path):
+        return _tgs_frame(path, 0)
+    if _is_image(path):
+        # still lazy, draft() can shrink jpegs while decoding
+        return Image.open(path)
+    return Image.open(BytesIO(ffpipe.first_frame_png(path)))
+
+
+def _rgb(frame: Image.Image, size: Tuple[int, int],
+         background: Optional[Tuple[int, int, int]]) -> bytes:
+    if frame.size != size:
+        frame = frame.resize(size, Image.LANCZOS)
+    if background is not None and frame.mode in ("RGBA", "LA", "P"):
+        frame = frame.convert("RGBA")
+        base = Image.new("RGBA", size, background)
+        base.alpha_composite(frame)
+        frame = base
+    return frame.convert("RGB").tobytes()
+
+
+def render_frames(path: str, start: int, stop: int, size: Tuple[int, int],
+                  background: Optional[Tuple[int, int, int]] = None) -> List[bytes]:
+    """ rgb24 frames [start, stop) of a tgs sticker or an image, scaled to ``size``
+
+    transparent parts go over ``background`` if given. blocking, call it
+    from process pool jobs """
+    if is_tgs(path):
+        stop = min(stop, tgs_info(path)[3])
+        return [_rgb(_tgs_frame(path, index, size), size, background)
+                for index in range(start, stop)]
+    with Image.open(path) as img:
+        stop = min(stop, getattr(img, "n_frames", 1))
+        frames = ImageSequence.Iterator(img)
+        return [_rgb(frames[index], size, background) for index in range(start, stop)]
+
+
+async def probe(path: str) -> Optional[Tuple[int, int, str]]:
+    """ (width, height, frame rate) of any media file, like ffpipe.probe """
+    if not (is_tgs(path) or _is_image(path)):
+        return await ffpipe.probe(path)
+    try:
+        info = await run_in_process(tgs_info if is_tgs(path) else _image_info, path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return info[:3]
+
+
+async def decode(path: str, size: Tuple[int, int], limit: Optional[int] = None,
+                 message: Optional[Message] = None) -> AsyncIterator[bytes]:
+    """ yields up to ``limit`` frames of any media file scaled to ``size``
+
+    frames are rgb24 bytes, like ffpipe.decode gives, and are decoded lazily,
+    a chunk at a time in the process pool for stickers and images """
+    if not (is_tgs(path) or _is_image(path)):
+        async for frame in ffpipe.decode(path, size, limit):
+            yield frame
+        return
+    start = 0
+    while limit is None or start < limit:
+        stop = start + FRAME_CHUNK
+        if limit is not None:
+            stop = min(stop, limit)
+        chunk = await run_in_process(
+            render_frames, path, start, stop, size, message=message)
+        for frame in chunk:
+            yield frame
+        if len(chunk) < stop - start:
+            break
+        start = stop
@@ -0,0 +1,166 @@
+""" Shared aiohttp client used by the plugins """
+
+# One pooled ClientSession for every plugin, so repeated calls to the
+# same API reuse warm keep-alive connections instead of doing a fresh
+# TCP + TLS handshake each time.
+
+import asyncio
+import atexit
+import json
+import os
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from multidict import CIMultiDictProxy
+
+from resources import ratelimit
+from resources.breaker import get_breaker
+from resources.singleflight import SingleFlight
+
+HTTP_TIMEOUT = int(os.environ.get("HTTP_TIMEOUT") or 30)
+HTTP_CONNECT_TIMEOUT = int(os.environ.get("HTTP_CONNECT_TIMEOUT") or 10)
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT") or 100)
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST") or 10)
+HTTP_KEEPALIVE_TIMEOUT = int(os.environ.get("HTTP_KEEPALIVE_TIMEOUT") or 60)
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL") or 300)
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES") or 3)
+
+# statuses worth retrying after a (Retry-After aware) backoff
+_RETRY_STATUSES = (429, 503)
+
+_SESSION: Optional[ClientSession] = None
+_FLIGHTS = SingleFlight()
+
+
+def get_session() -> ClientSession:
+    """ returns the shared session, creating it on first use """
+    global _SESSION  # pylint: disable=global-statement
+    if _SESSION is None or _SESSION.closed:
+        connector = TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        _SESSION = ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(total=HTTP_TIMEOUT, sock_connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _SESSION
+
+
+async def close_session() -> None:
+    """ closes the shared session and its connection pool """
+    global _SESSION  # pylint: disable=global-statement
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+@atexit.register
+def _close_on_exit() -> None:
+    if _SESSION is None or _SESSION.closed:
+        return
+    try:
+        loop = asyncio.get_event_loop()
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(close_session())
+    except RuntimeError:
+        pass
+
+
+class HttpResponse:
+    """ fully read response, safe to use after the connection went back to the pool """
+
+    __slots__ = ("url", "status", "reason", "headers", "content", "_encoding")
+
+    def __init__(self, url: str, status: int, reason: str,
+                 headers: CIMultiDictProxy, content: bytes,
+                 encoding: Optional[str] = None) -> None:
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self._encoding = encoding
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def encoding(self) -> str:
+        """ charset of the Content-Type header, utf-8 if it has none
+
+        never sniffed from the body, binary payloads aren't scanned """
+        if self._encoding is None:
+            self._encoding = "utf-8"
+            for param in self.headers.get("Content-Type", "").split(";")[1:]:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "charset" and value.strip(' "'):
+                    self._encoding = value.strip(' "')
+                    break
+        return self._encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+async def request(method: str, url: str, **kwargs: Any) -> HttpResponse:
+    """ awaitable drop-in for requests.request on the shared session """
+    if method in ("GET", "HEAD"):
+        # identical idempotent requests in flight share one upstream call
+        key = (method, url, repr(sorted(kwargs.items())))
+        return await _FLIGHTS.do(key, _request, method, url, **kwargs)
+    return await _request(method, url, **kwargs)
+
+
+async def _request(method: str, url: str, **kwargs: Any) -> HttpResponse:
+    host = urlsplit(url).hostname or ""
+    # streamed / multipart bodies are consumed by the first attempt
+    replayable = isinstance(kwargs.get("data"), (type(None), bytes, str))
+    breaker = get_breaker(host)
+    attempt = 0
+    while True:
+        # fail fast while the host is known to be down
+        breaker.before_call()
+        await ratelimit.acquire(host)
+        try:
+            async with get_session().request(method, url, **kwargs) as resp:
+                content = await resp.read()
+                response = HttpResponse(str(resp.url), resp.status, resp.reason,
+                                        resp.headers, content)
+        except (ClientError, asyncio.TimeoutError):
+            breaker.record_failure()
+            raise
+        if response.status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if (response.status not in _RETRY_STATUSES
+                or not replayable or attempt >= HTTP_MAX_RETRIES):
+            return response
+        delay = ratelimit.retry_after(response.headers)
+        if delay is None:
+            delay = ratelimit.backoff(attempt)
+        elif delay > HTTP_TIMEOUT:
+            # not worth holding the command (and the host's bucket) that long
+            return response
+        else:
+            ratelimit.pause(host, delay)
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def get(url: str, **kwargs: Any) -> HttpResponse:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs: Any) -> HttpResponse:
+    return await request("POST", url, **kwargs)
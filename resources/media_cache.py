@@ -0,0 +1,220 @@
+""" Disk cache of telegram media keyed by file_unique_id """
+
+# Media is downloaded once into CACHE_PATH and served from there while it
+# stays in the cache, so replying twice to the same media, or cloning the
+# same profile photo again, doesn't touch the network. Stills of animated
+# stickers and clips, for commands that send one on, are cached too. Files
+# are evicted least recently used first once MEDIA_CACHE_SIZE is exceeded,
+# except the ones callers are still using: every fetch pins its file until
+# the ``async with`` block ends. Cached files are shared, never modify or
+# remove them, write results somewhere else.
+
+import os
+import shutil
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from paimon import Config, Message
+from paimon.utils import progress
+from paimon.utils.exceptions import ProcessCanceled
+from resources import frames
+from resources.process_pool import run_in_process
+from resources.singleflight import SingleFlight
+
+CACHE_PATH = os.path.join(Config.DOWN_PATH, "media_cache")
+# in MB
+MEDIA_CACHE_SIZE = int(os.environ.get("MEDIA_CACHE_SIZE") or 512) * 1024 * 1024
+_TMP_PATH = os.path.join(CACHE_PATH, "tmp")
+
+_FLIGHTS = SingleFlight()
+
+
+class _Entry:
+    __slots__ = ("path", "size", "refs")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.refs = 0
+
+
+# key -> entry, least recently used first
+_ENTRIES: "OrderedDict[str, _Entry]" = OrderedDict()
+_LOADED = False
+
+
+def _load() -> None:
+    """ picks up the files cached before a restart, oldest first """
+    global _LOADED  # pylint: disable=global-statement
+    if _LOADED:
+        return
+    _LOADED = True
+    shutil.rmtree(_TMP_PATH, ignore_errors=True)
+    if not os.path.isdir(CACHE_PATH):
+        return
+    paths = [os.path.join(CACHE_PATH, name) for name in os.listdir(CACHE_PATH)]
+    for path in sorted(filter(os.path.isfile, paths), key=os.path.getmtime):
+        _ENTRIES[os.path.splitext(os.path.basename(path))[0]] = _Entry(path)
+
+
+def _add(key: str, path: str) -> None:
+    if key not in _ENTRIES:
+        _ENTRIES[key] = _Entry(path)
+
+
+def _evict() -> None:
+    total = sum(entry.size for entry in _ENTRIES.values())
+    for key, entry in list(_ENTRIES.items()):
+        if total <= MEDIA_CACHE_SIZE:
+            break
+        if entry.refs:
+            # in use, it goes once it is released
+            continue
+        del _ENTRIES[key]
+        total -= entry.size
+        if os.path.exists(entry.path):
+            os.remove(entry.path)
+
+
+@asynccontextmanager
+async def _pinned(key: str, make: Callable[[], Awaitable[Optional[str]]]
+                  ) -> AsyncIterator[Optional[str]]:
+    _load()
+    while True:
+        entry = _ENTRIES.get(key)
+        if entry is not None and os.path.exists(entry.path):
+            break
+        _ENTRIES.pop(key, None)
+        path = await _FLIGHTS.do(key, make)
+        if path is None:
+            yield None
+            return
+        _add(key, path)
+    _ENTRIES.move_to_end(key)
+    # keeps the lru order across restarts
+    os.utime(entry.path)
+    entry.refs += 1
+    try:
+        _evict()
+        yield entry.path
+    finally:
+        entry.refs -= 1
+        _evict()
+
+
+def _media(message: Message):
+    for kind in ("photo", "sticker", "animation", "video", "video_note",
+                 "audio", "voice", "document"):
+        media = getattr(message, kind, None)
+        if media:
+            return media
+    return None
+
+
+def unique_id(message: Message) -> Optional[str]:
+    """ file_unique_id of the media of ``message`` """
+    media = _media(message)
+    return media.file_unique_id if media else None
+
+
+async def _download(key: str, client, target, status: Optional[Message],
+                    text: str) -> str:
+    tmp_dir = os.path.join(_TMP_PATH, key)
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        if status is not None:
+            dls = await client.download_media(
+                target, file_name=tmp_dir + os.sep,
+                progress=progress, progress_args=(status, text))
+        else:
+            dls = await client.download_media(target, file_name=tmp_dir + os.sep)
+        path = os.path.join(CACHE_PATH, key + os.path.splitext(dls)[1])
+        os.replace(dls, path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return path
+
+
+@asynccontextmanager
+async def fetch(message: Message, status: Optional[Message] = None,
+                text: str = "Downloading...") -> AsyncIterator[Optional[str]]:
+    """ path of the media of ``message``, None if it has none
+
+    ``status`` shows the download progress, like download_media does """
+    media = _media(message)
+    if media is None:
+        yield None
+        return
+    key = media.file_unique_id
+    async with _pinned(key, lambda: _download(
+            key, message.client, message, status, text)) as path:
+        yield path
+
+
+@asynccontextmanager
+async def fetch_file(client, file_id: str, file_unique_id: str) -> AsyncIterator[str]:
+    """ path of a file known only by its id, e.g. a chat photo """
+    async with _pinned(file_unique_id, lambda: _download(
+            file_unique_id, client, file_id, None, "")) as path:
+        yield path
+
+
+def _is_clip(message: Message) -> bool:
+    return bool(message.animation or message.video or (
+        message.sticker and (message.sticker.file_name or "").endswith(".webm")))
+
+
+def _is_tgs(message: Message) -> bool:
+    return bool(message.sticker and (message.sticker.file_name or "").endswith(".tgs"))
+
+
+@asynccontextmanager
+async def source(message: Message) -> AsyncIterator[Optional[str]]:
+    """ cached file of the replied photo, sticker or clip
+
+    commands that draw on it decode it with resources.frames """
+    replied = message.reply_to_message
+    if not (replied and (replied.photo or replied.sticker
+                         or replied.animation or replied.video)):
+        await message.err("<code>Replied to a wrong media type</code>")
+        yield None
+        return
+    async with fetch(replied, message, "`Trying to Posses given content`") as path:
+        yield path
+
+
+def _save_still(src: str, dest: str) -> None:
+    frames.first_frame(src).save(dest, "PNG")
+
+
+@asynccontextmanager
+async def still_image(message: Message) -> AsyncIterator[Optional[str]]:
+    """ cached still image file of the replied media, in place of media_to_image
+
+    for sending it on, animated stickers and clips give their first frame """
+    replied = message.reply_to_message
+    if not (replied and (_is_clip(replied) or _is_tgs(replied))):
+        async with source(message) as path:
+            yield path
+        return
+    key = _media(replied).file_unique_id + "-still"
+
+    async def _draw() -> Optional[str]:
+        os.makedirs(_TMP_PATH, exist_ok=True)
+        tmp = os.path.join(_TMP_PATH, key + ".png")
+        async with source(message) as src:
+            if _is_clip(replied):
+                await message.edit("<code>Look it's GF. Drawing ...</code>")
+            try:
+                await run_in_process(_save_still, src, tmp, message=message)
+            except (OSError, ProcessCanceled):
+                return None
+        path = os.path.join(CACHE_PATH, os.path.basename(tmp))
+        os.replace(tmp, path)
+        return path
+
+    async with _pinned(key, _draw) as path:
+        if path is None:
+            await message.err("```Couldn't draw this media...```", del_in=5)
+        yield path
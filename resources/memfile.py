@@ -0,0 +1,26 @@
+""" In-memory files for uploading generated images """
+
+# A generated image is encoded straight into a BytesIO that carries a file
+# name, pyrogram uploads it like a file on disk, so the output of a command
+# never touches the filesystem. Only the format that is sent gets encoded.
+# These objects pickle with their name, process pool jobs can return them.
+
+import os
+from io import BytesIO
+from typing import Any, Optional
+
+from PIL import Image
+
+
+def to_file(image: Any, name: str, format_: Optional[str] = None,
+            **params: Any) -> BytesIO:
+    """ ``image`` encoded in the format of ``name``'s extension, or ``format_``
+
+    anything with a PIL like ``save(fp, format)`` works, e.g. qrcode images """
+    if format_ is None:
+        format_ = Image.registered_extensions()[os.path.splitext(name)[1].lower()]
+    file_ = BytesIO()
+    image.save(file_, format_, **params)
+    file_.name = name
+    file_.seek(0)
+    return file_
@@ -0,0 +1,52 @@
+""" Telegram file_id cache of rendered command outputs """
+
+# Commands whose output only depends on their input remember the file_id
+# of the media they sent, under a hash of (command, parameters, input
+# file_unique_id). Asking for the same output again is then a single
+# send_cached_media call, nothing is rendered or uploaded. A file_id only
+# works for the client that sent it, so the bot and the user account keep
+# their own entries.
+
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+from pyrogram.errors import BadRequest
+
+from paimon import Message, get_collection
+
+_OUTPUTS = get_collection("OUTPUT_CACHE")
+
+
+def output_key(client, command: str, *params: Any) -> str:
+    """ cache key of a render, ``params`` must be json serializable """
+    raw = json.dumps([command, bool(client.is_bot), *params], ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def send_cached(client, chat_id: int, key: str,
+                      reply_to_message_id: Optional[int] = None) -> bool:
+    """ sends the output cached under ``key`` again, False if there is none """
+    cached = await _OUTPUTS.find_one({'_id': key})
+    if not cached:
+        return False
+    try:
+        await client.send_cached_media(
+            chat_id, cached['file_id'], reply_to_message_id=reply_to_message_id)
+    except BadRequest:
+        # file_id got invalid, render it again
+        await _OUTPUTS.delete_one({'_id': key})
+        return False
+    return True
+
+
+async def remember(key: str, sent: Optional[Message]) -> None:
+    """ caches the media of the ``sent`` output under ``key`` """
+    media = sent and (sent.sticker or sent.animation or sent.photo
+                      or sent.video or sent.document)
+    if media:
+        await _OUTPUTS.update_one(
+            {'_id': key},
+            {"$set": {'file_id': media.file_id, 'time': int(time.time())}},
+            upsert=True)
@@ -0,0 +1,132 @@
+""" Shared process pool for CPU-bound media work """
+
+# PIL work run inside a handler blocks the event loop, and threads don't
+# help since it holds the GIL for most of it. Heavy jobs are sent to a pool
+# of worker processes instead, so concurrent image commands use every core.
+# Workers come from a fork server, not from a fork of the bot: the bot
+# runs mongo, pyrogram and aiohttp threads, and a child forked while one
+# of them holds a lock can deadlock on it. The fork server preloads only
+# side effect free compute modules; a worker imports the plugin a job
+# comes from when it gets the job, so module level functions of plugins
+# can still be sent. A job that times out or is canceled while running
+# can only be stopped by restarting the pool; jobs of other commands that
+# were in the old pool are transparently submitted again.
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+
+from paimon import Message
+from paimon.utils.exceptions import ProcessCanceled
+
+PROCESS_WORKERS = int(os.environ.get("PROCESS_WORKERS") or os.cpu_count() or 1)
+PROCESS_TIMEOUT = int(os.environ.get("PROCESS_TIMEOUT") or 120)
+# how often a running job checks message.process_is_canceled
+_POLL_INTERVAL = 0.5
+
+# imported once by the fork server, no module with import time side effects
+_PRELOAD = ["numpy", "PIL.Image", "PIL.ImageDraw", "PIL.ImageFont",
+            "resources.textfit", "resources.frames"]
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+# (func, args) every worker runs as it starts, e.g. loading fonts
+_WORKER_INIT: List[Tuple[Callable[..., Any], tuple]] = []
+
+
+def on_worker_start(func: Callable[..., Any], *args: Any) -> None:
+    """ runs ``func(*args)`` in every worker of pools started from now on """
+    _WORKER_INIT.append((func, args))
+
+
+def _init_worker(jobs: Tuple[Tuple[Callable[..., Any], tuple], ...]) -> None:
+    for func, args in jobs:
+        try:
+            func(*args)
+        except Exception:  # pylint: disable=broad-except
+            # a cold cache, not a broken worker
+            pass
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """ returns the shared pool, starting it on first use """
+    global _EXECUTOR  # pylint: disable=global-statement
+    if _EXECUTOR is None:
+        context = multiprocessing.get_context("forkserver")
+        # only used when the fork server starts, i.e. by the first pool
+        context.set_forkserver_preload(_PRELOAD)
+        _EXECUTOR = ProcessPoolExecutor(
+            max_workers=max(PROCESS_WORKERS, 1), mp_context=context,
+            initializer=_init_worker, initargs=(tuple(_WORKER_INIT),))
+    return _EXECUTOR
+
+
+def _restart(executor: ProcessPoolExecutor) -> None:
+    """ kills the workers, the next job starts a fresh pool """
+    global _EXECUTOR  # pylint: disable=global-statement
+    if executor is not _EXECUTOR:
+        # already replaced because of another job
+        return
+    _EXECUTOR = None
+    # pylint: disable=protected-access
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False)
+
+
+def _abort(executor: ProcessPoolExecutor, future: Future,
+           waiter: asyncio.Future) -> None:
+    # nobody awaits the job anymore, silence its BrokenProcessPool
+    waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+    if not future.cancel() and not future.done():
+        _restart(executor)
+
+
+async def _wait(executor: ProcessPoolExecutor, future: Future,
+                message: Optional[Message], timeout: float) -> Any:
+    loop = asyncio.get_event_loop()
+    waiter = asyncio.wrap_future(future)
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                _abort(executor, future, waiter)
+                raise ProcessCanceled(f"Process timed out after {timeout}s!")
+            done, _ = await asyncio.wait({waiter}, timeout=min(_POLL_INTERVAL, remaining))
+            if done:
+                return waiter.result()
+            if message is not None and message.process_is_canceled:
+                _abort(executor, future, waiter)
+                raise ProcessCanceled("Process Canceled!")
+    except asyncio.CancelledError:
+        _abort(executor, future, waiter)
+        raise
+
+
+async def _submit(func: Callable[..., Any], args: tuple, kwargs: dict,
+                  message: Optional[Message], timeout: float) -> Any:
+    executor = get_executor()
+    try:
+        future = executor.submit(func, *args, **kwargs)
+        return await _wait(executor, future, message, timeout)
+    except BrokenProcessPool:
+        # a crashed worker breaks the whole pool, replace it
+        _restart(executor)
+        raise
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any,
+                         message: Optional[Message] = None,
+                         timeout: float = PROCESS_TIMEOUT, **kwargs: Any) -> Any:
+    """ runs ``func(*args, **kwargs)`` in the shared process pool
+
+    raises ProcessCanceled if the job takes longer than ``timeout`` seconds
+    or ``message`` is canceled meanwhile """
+    try:
+        return await _submit(func, args, kwargs, message, timeout)
+    except BrokenProcessPool:
+        # another job was killed with the pool this one was queued in
+        return await _submit(func, args, kwargs, message, timeout)
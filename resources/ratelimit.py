@@ -0,0 +1,96 @@
+""" Per-host token-bucket rate limiting and retry backoff """
+
+# Requests to a throttled host wait in a FIFO queue for a token instead of
+# hammering the API, and a 429 / Retry-After from the host pauses its
+# bucket for every caller, not just the one that got rejected.
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+# host: (requests, per seconds)
+HOST_LIMITS: Dict[str, Tuple[int, float]] = {
+    "graphql.anilist.co": (90, 60),
+    "nominatim.openstreetmap.org": (1, 1),
+    "nekobot.xyz": (30, 60),
+    "api.deepai.org": (30, 60),
+    "trace.moe": (10, 60),
+}
+
+
+class TokenBucket:
+    """ allows ``rate`` calls per ``per`` seconds, queueing callers fairly """
+
+    def __init__(self, rate: int, per: float) -> None:
+        self.capacity = rate
+        self.fill_rate = rate / per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # asyncio.Lock wakes waiters in FIFO order
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.fill_rate)
+
+    def pause(self, delay: float) -> None:
+        """ stop handing out tokens for ``delay`` seconds """
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+
+_BUCKETS: Dict[str, TokenBucket] = {}
+
+
+def get_bucket(host: str) -> Optional[TokenBucket]:
+    """ returns the bucket for a rate limited host, None if it isn't limited """
+    if host not in _BUCKETS:
+        if host not in HOST_LIMITS:
+            return None
+        _BUCKETS[host] = TokenBucket(*HOST_LIMITS[host])
+    return _BUCKETS[host]
+
+
+async def acquire(host: str) -> None:
+    bucket = get_bucket(host)
+    if bucket is not None:
+        await bucket.acquire()
+
+
+def pause(host: str, delay: float) -> None:
+    bucket = get_bucket(host)
+    if bucket is not None:
+        bucket.pause(delay)
+
+
+def backoff(attempt: int, base: float = 0.5, cap: float = 30) -> float:
+    """ exponential backoff with full jitter """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """ parses a Retry-After header given either in seconds or as a http date """
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,31 @@
+""" Single-flight coalescing of identical concurrent calls """
+
+# While a call for some key is in flight, later callers for the same key
+# await that call's result instead of starting a duplicate request.
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """ shares one in-flight task between callers of the same key """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]],
+                 *args: Any, **kwargs: Any) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # shield, so one caller giving up doesn't cancel the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -0,0 +1,91 @@
+""" Async Telegraph client shared by the plugins """
+
+# The account token is created once and kept in mongo, pages are posted
+# over the shared http session and page urls are remembered by a hash of
+# title + content, so re-posting the same page returns the old url.
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import Optional
+
+from aiohttp import FormData
+from html_telegraph_poster.converter import convert_html_to_telegraph_format
+
+from paimon import get_collection
+from resources import http_client
+from resources.cache import TTLCache
+
+API_URL = "https://api.telegra.ph"
+UPLOAD_URL = "https://telegra.ph/upload"
+SHORT_NAME = "paimon"
+
+_ACCOUNT = get_collection("TELEGRAPH")
+_PAGES = TTLCache("telegraph", ttl=30 * 24 * 3600, maxsize=512, persist=True)
+_TOKEN: Optional[str] = None
+_TOKEN_LOCK = asyncio.Lock()
+
+
+class TelegraphError(Exception):
+    """ error returned by the telegraph api """
+
+
+async def _call(method: str, **params) -> dict:
+    resp = (await http_client.post(f"{API_URL}/{method}", data=params)).json()
+    if not resp.get('ok'):
+        raise TelegraphError(resp.get('error', "unknown telegraph error"))
+    return resp['result']
+
+
+async def get_token(renew: bool = False) -> str:
+    """ returns the saved account token, creating the account only once """
+    global _TOKEN  # pylint: disable=global-statement
+    async with _TOKEN_LOCK:
+        if _TOKEN and not renew:
+            return _TOKEN
+        if not renew:
+            saved = await _ACCOUNT.find_one({'_id': "ACCOUNT"})
+            if saved:
+                _TOKEN = saved['token']
+                return _TOKEN
+        account = await _call("createAccount", short_name=SHORT_NAME)
+        _TOKEN = account['access_token']
+        await _ACCOUNT.update_one(
+            {'_id': "ACCOUNT"}, {"$set": {'token': _TOKEN}}, upsert=True)
+        return _TOKEN
+
+
+async def post_page(title: str, html: str, author_name: str = "",
+                    author_url: str = "") -> str:
+    """ posts html content and returns the page url """
+    key = hashlib.sha256(
+        json.dumps([title, html, author_name, author_url]).encode()).hexdigest()
+    url = await _PAGES.get(key)
+    if isinstance(url, str):
+        return url
+    params = dict(
+        title=title[:256],
+        author_name=author_name[:128],
+        author_url=author_url,
+        content=convert_html_to_telegraph_format(html, clean_html=True),
+    )
+    try:
+        page = await _call("createPage", access_token=await get_token(), **params)
+    except TelegraphError as t_e:
+        if "ACCESS_TOKEN_INVALID" not in str(t_e):
+            raise
+        page = await _call("createPage", access_token=await get_token(True), **params)
+    await _PAGES.set(key, page['url'])
+    return page['url']
+
+
+async def upload_file(path: str) -> str:
+    """ uploads a media file and returns its telegra.ph path """
+    with open(path, "rb") as file_:
+        data = FormData()
+        data.add_field("file", file_, filename=os.path.basename(path))
+        resp = (await http_client.post(UPLOAD_URL, data=data)).json()
+    if isinstance(resp, dict):
+        raise TelegraphError(resp.get('error', "upload failed"))
+    return resp[0]['src']
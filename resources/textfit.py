@@ -0,0 +1,54 @@
+""" Fitting text into a box with the largest font size """
+
+# The font size is binary searched instead of shrinking it step by step,
+# and loaded fonts and measured layouts are cached, so fitting the same
+# text again costs no font loads or layout passes.
+
+from functools import lru_cache
+from io import BytesIO
+from typing import Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+# a font is either the path of a font file or its content
+FontSource = Union[str, bytes]
+
+_MEASURE = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+@lru_cache(maxsize=64)
+def load_font(font: FontSource, size: int) -> ImageFont.FreeTypeFont:
+    """ cached ImageFont.truetype """
+    if isinstance(font, bytes):
+        return ImageFont.truetype(BytesIO(font), size)
+    return ImageFont.truetype(font, size)
+
+
+@lru_cache(maxsize=1024)
+def measure(font: FontSource, size: int, text: str,
+            stroke_width: int = 0) -> Tuple[int, int]:
+    """ (width, height) of a multiline text """
+    return _MEASURE.multiline_textsize(
+        text, font=load_font(font, size), stroke_width=stroke_width)
+
+
+def fit_size(font: FontSource, text: str, box: Tuple[int, int], max_size: int,
+             min_size: int = 1, stroke_width: int = 0) -> int:
+    """ largest size in [min_size, max_size] at which text fits the box """
+    best = min_size
+    low, high = min_size, max_size
+    while low <= high:
+        mid = (low + high) // 2
+        width, height = measure(font, mid, text, stroke_width)
+        if width <= box[0] and height <= box[1]:
+            best = mid
+            low = mid + 1
+        else:
+            high = mid - 1
+    return best
+
+
+def fit_font(font: FontSource, text: str, box: Tuple[int, int], max_size: int,
+             min_size: int = 1, stroke_width: int = 0) -> ImageFont.FreeTypeFont:
+    """ the font loaded at the largest size that fits the box """
+    return load_font(font, fit_size(font, text, box, max_size, min_size, stroke_width))
@@ -0,0 +1,51 @@
+""" Per-invocation scratch directories for media commands """
+
+# Every command run gets its own fresh directory for downloads and outputs,
+# so two runs of the same command never write to the same file, and the
+# directory is removed with everything in it when the run ends, errors and
+# cancellation included. WORKSPACE_PATH can point to a tmpfs mount (e.g.
+# /dev/shm/paimon) to keep these short lived files in memory. Importing
+# this module has no side effects, clear_stale() runs from a startup hook.
+
+import os
+import shutil
+import tempfile
+
+from paimon import Config
+
+WORKSPACE_PATH = os.environ.get("WORKSPACE_PATH") or os.path.join(
+    Config.DOWN_PATH, "workspace")
+
+
+class Workspace:
+    """ a scratch directory, use it as ``with Workspace("name") as work:`` """
+
+    def __init__(self, prefix: str = "work") -> None:
+        self._prefix = prefix
+        self.path = ""
+
+    def __enter__(self) -> "Workspace":
+        os.makedirs(WORKSPACE_PATH, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=f"{self._prefix}_", dir=WORKSPACE_PATH)
+        return self
+
+    def __exit__(self, *_) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @property
+    def down_path(self) -> str:
+        """ directory to pass as ``file_name`` of download_media """
+        return self.path + os.sep
+
+    def file(self, name: str) -> str:
+        """ path of ``name`` inside the workspace """
+        return os.path.join(self.path, name)
+
+
+def clear_stale() -> None:
+    """ removes the workspaces left behind by runs killed with the bot
+
+    call it once at startup, before any command runs, never later """
+    if os.path.isdir(WORKSPACE_PATH):
+        for name in os.listdir(WORKSPACE_PATH):
+            shutil.rmtree(os.path.join(WORKSPACE_PATH, name), ignore_errors=True)
@@ -0,0 +1,105 @@
+""" No plugin may call the blocking ``requests`` library on the event loop """
+
+# Plugins are scanned, not imported, so this runs without the bot's
+# dependencies. Inside a coroutine, a ``requests`` call is only allowed in
+# a function wrapped by ``pool.run_in_thread``; calling a module level
+# helper that uses ``requests`` without that wrapper is flagged as well.
+
+import ast
+from pathlib import Path
+from typing import List, Set
+
+import pytest
+
+PLUGINS = Path(__file__).resolve().parent.parent / "plugins"
+
+
+def _plugin_files() -> List[Path]:
+    # plugins without an extension (app, time) are python too
+    return sorted(path for path in PLUGINS.rglob("*") if path.is_file() and (
+        path.suffix == ".py" or (not path.suffix and "__pycache__" not in path.parts)))
+
+
+def _in_thread(func: ast.AST) -> bool:
+    for deco in getattr(func, "decorator_list", ()):
+        target = deco.func if isinstance(deco, ast.Call) else deco
+        name = target.attr if isinstance(target, ast.Attribute) else getattr(target, "id", "")
+        if name == "run_in_thread":
+            return True
+    return False
+
+
+class _Scanner:
+    def __init__(self, tree: ast.Module) -> None:
+        self.modules: Set[str] = set()
+        self.names: Set[str] = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                self.modules.update(alias.asname or alias.name for alias in node.names
+                                    if alias.name.split(".")[0] == "requests")
+            elif isinstance(node, ast.ImportFrom) and (
+                    node.module or "").split(".")[0] == "requests":
+                self.names.update(alias.asname or alias.name for alias in node.names)
+        # module level helpers that block when called
+        self.blocking = {node.name for node in tree.body
+                         if isinstance(node, ast.FunctionDef) and not _in_thread(node)
+                         and self._calls(node, set())}
+
+    def _is_requests(self, call: ast.Call) -> bool:
+        func = call.func
+        if isinstance(func, ast.Name):
+            return func.id in self.names
+        while isinstance(func, ast.Attribute):
+            func = func.value
+        return isinstance(func, ast.Name) and func.id in self.modules
+
+    def _calls(self, node: ast.AST, blocking: Set[str]) -> List[ast.Call]:
+        found = []
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.AsyncFunctionDef) or (
+                    isinstance(child, ast.FunctionDef) and _in_thread(child)):
+                continue
+            if isinstance(child, ast.Call) and (self._is_requests(child) or (
+                    isinstance(child.func, ast.Name) and child.func.id in blocking)):
+                found.append(child)
+            found.extend(self._calls(child, blocking))
+        return found
+
+    def offenders(self, tree: ast.Module) -> List[ast.Call]:
+        found = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.AsyncFunctionDef):
+                found.extend(self._calls(node, self.blocking))
+        return found
+
+
+def _offenders(source: str) -> List[int]:
+    tree = ast.parse(source)
+    return [call.lineno for call in _Scanner(tree).offenders(tree)]
+
+
+@pytest.mark.parametrize("path", _plugin_files(), ids=lambda path: path.name)
+def test_no_requests_on_event_loop(path: Path) -> None:
+    lines = _offenders(path.read_text(encoding="utf-8"))
+    assert not lines, f"blocking requests call in a coroutine: {path.name} lines {lines}"
+
+
+@pytest.mark.parametrize("source", [
+    "import requests\nasync def f():\n    requests.get('x')\n",
+    "import requests as r\nasync def f():\n    s = r.Session()\n",
+    "from requests import post\nasync def f():\n    post('x')\n",
+    "import requests\ndef g():\n    return requests.get('x')\nasync def f():\n    g()\n",
+    "import requests\nasync def f():\n    def g():\n        requests.get('x')\n    g()\n",
+])
+def test_scanner_flags_blocking_calls(source: str) -> None:
+    assert _offenders(source)
+
+
+@pytest.mark.parametrize("source", [
+    "import requests\n@pool.run_in_thread\ndef g():\n    return requests.get('x')\n"
+    "async def f():\n    await g()\n",
+    "import requests\ndef g():\n    return requests.get('x')\n",
+    "from resources import http_client\nasync def f():\n    await http_client.get('x')\n",
+])
+def test_scanner_allows_threaded_calls(source: str) -> None:
+    assert not _offenders(source)